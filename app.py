@@ -1,143 +1,22 @@
 import streamlit as st
+import json
 import os
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
 from dotenv import load_dotenv
-from autogen import AssistantAgent
 
-load_dotenv()
-
-# Creating Different Agents
-class TutorAgents:
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.llm_config = {'config_list': [
-            {'model': 'llama-3.3-70b-versatile', 'api_key': self.api_key, 'api_type': "groq"}]}
-
-        # Lesson Generator
-        self.lesson_agent = AssistantAgent(
-            name="lesson_agent",
-            system_message="Create detailed structured learning modules on the given topic. Ensure the lesson includes an introduction, key concepts, examples, and a summary. DO NOT include your thought process, just the lesson content.",
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        # MCQs Generator (now takes lesson content as input)
-        self.mcq_agent = AssistantAgent(
-            name="mcq_agent",
-            system_message="Generate multiple-choice questions (MCQs) based on the provided lesson content. Follow this exact format for each question:\n\nQ1. [Question text]\nA) [Option A]\nB) [Option B]\nC) [Option C]\nD) [Option D]\n\nCorrect Answer: [Letter]\n\nEach question must be numbered with Q followed by the number. Each option must start with a capital letter followed by a parenthesis. DO NOT include explanations or additional text.",
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        # MCQs Feedback Agent
-        self.mcq_feedback_agent = AssistantAgent(
-            name="mcq_feedback_agent",
-            system_message="Evaluate the user's MCQ answers. Provide a score, explanations for correct/incorrect responses, and suggestions for improvement.",
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        # Interview Question Generator (now with realistic questions)
-        self.interview_agent = AssistantAgent(
-            name="interview_agent",
-            system_message="Generate a realistic interview question for the given topic, considering the specified difficulty level. Ask questions that are commonly asked in actual job interviews - focus on conceptual understanding, problem-solving approaches, past experiences, behavioral scenarios, or industry trends rather than coding exercises. If the user's previous performance is provided, adjust the difficulty accordingly.",
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        # Feedback Agent - update this system message
-        self.feedback_agent = AssistantAgent(
-            name="feedback_agent",
-            system_message="Evaluate the user's answer as if it were given in a real interview setting. Consider communication skills, clarity, technical accuracy, and how well they demonstrate understanding of the subject. Provide constructive feedback that focuses on both strengths and areas for improvement, similar to what an interviewer would consider. Return a rating from 1-5, where 1 is poor and 5 is excellent. Format your response like this: 'Rating: X/5\n\nFeedback: [Your detailed feedback here]'",
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        # Overall Performance Agent
-        self.performance_agent = AssistantAgent(
-            name="performance_agent",
-            system_message="Analyze the user's overall performance across both MCQs and interview questions. Provide a comprehensive evaluation highlighting strengths, areas for improvement, and specific recommendations for further study. Include quantitative metrics where available.",
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-    def generate_lesson(self, subject, topic):
-        """Generates a structured lesson plan."""
-        # If topic is empty, create a lesson about the general subject
-        content = f"Create a detailed lesson plan on {topic} for {subject}." if topic else f"Create a detailed lesson plan on {subject}."
-        
-        response = self.lesson_agent.generate_reply(
-            messages=[{"role": "user", "content": content}]
-        )
-        return response.get("content", "Lesson generation failed!") if isinstance(response, dict) else str(response)
-
-    def generate_mcqs_from_lesson(self, lesson_content, num_questions):
-        """Generates MCQs based on the lesson content."""
-        response = self.mcq_agent.generate_reply(
-            messages=[{
-                "role": "user",
-                "content": f"Generate {num_questions} DIFFERENT MCQs based on the following lesson content. Ensure these questions are diverse and cover various aspects of the material:\n\n{lesson_content}"
-            }]
-        )
-        return response.get("content", "MCQ generation failed!") if isinstance(response, dict) else str(response)
-
-    def evaluate_mcq_answers(self, user_answers):
-        """Evaluates the user's MCQ answers and provides explanations."""
-        response = self.mcq_feedback_agent.generate_reply(
-            messages=[
-                {"role": "user", "content": f"Evaluate these MCQ answers: {user_answers}"}]
-        )
-        return response.get("content", "Evaluation failed!") if isinstance(response, dict) else str(response)
-
-    def generate_next_interview_question(self, subject, topic, current_difficulty, previous_performance=None):
-        """Generates the next interview question based on previous performance."""
-        # If topic is empty, generate questions about the general subject
-        content = f"Generate a single {current_difficulty} realistic interview question for {topic} in {subject}. Make sure this question is DIFFERENT from any previous questions." if topic else f"Generate a single {current_difficulty} realistic interview question about {subject}. Ensure this is a UNIQUE question that hasn't been asked before."
-        
-        if previous_performance:
-            content += f"\n\nPrevious performance: {previous_performance}"
-        
-        # Add this line to track previous questions if you want to be extra sure
-        if hasattr(self, 'previous_questions') and self.previous_questions:
-            content += f"\n\nPrevious questions (DO NOT ask these again): {', '.join(self.previous_questions[-5:])}"
-        
-        response = self.interview_agent.generate_reply(
-            messages=[{"role": "user", "content": content}]
-        )
-        
-        # Store this question for future reference
-        if not hasattr(self, 'previous_questions'):
-            self.previous_questions = []
-        
-        question = response.get("content", "Question generation failed!") if isinstance(response, dict) else str(response)
-        self.previous_questions.append(question)
-        
-        return question
-
-
-    def evaluate_answer(self, question, user_answer):
-        """Evaluates user's answer and provides feedback with a rating."""
-        response = self.feedback_agent.generate_reply(
-            messages=[
-                {"role": "user", "content": f"Question: {question}\n\nUser's Answer: {user_answer}\n\nEvaluate this answer:"}]
-        )
-        return response.get("content", "Evaluation failed!") if isinstance(response, dict) else str(response)
-
-    def get_overall_performance(self, mcq_results, interview_results):
-        """Provides an overall assessment of the user's performance."""
-        combined_results = f"MCQ Results:\n{mcq_results}\n\nInterview Results:\n{interview_results}"
-        
-        response = self.performance_agent.generate_reply(
-            messages=[
-                {"role": "user", "content": f"Analyze the user's overall performance based on these results:\n\n{combined_results}"}]
-        )
-        return response.get("content", "Performance analysis failed!") if isinstance(response, dict) else str(response)
+from coach.agents import create_agents
+from coach.dedup import QuestionIndex
+from coach.parsing import format_mcqs, parse_rating
+from coach.pipeline import (QuestionPrefetcher, SectionedMCQGenerator, evaluate_round, generate_round_questions,
+                            next_difficulty, round_difficulty)
+from coach.scoring import format_misses_for_review, format_score_report, missed_questions, score_mcqs
+from coach.store import DEFAULT_STORE_PATH, INTERVIEW, MCQ, REPORT, SessionStore, is_user_id, new_user_id
+from coach.summary import PerformanceSummary
 
+load_dotenv()
 
 # Streamlit UI
 st.title("🎓Interview Preparation Coach")
@@ -145,13 +24,117 @@ st.title("🎓Interview Preparation Coach")
 # Retrieving API key from environment variables
 api_key = os.getenv("GROQ_API_KEY")
 
-# Checking if API key is set
-if not api_key:
+# Checking if API key is set, the offline fake backend does not need one
+if not api_key and os.getenv("LLM_BACKEND", "groq") != "fake":
     st.error("GROQ_API_KEY is missing. Please set it in your environment variables.")
     st.stop()
 
-# Initializing AI Agents
-agents = TutorAgents(api_key)
+# Initializing AI Agents once per process and sharing them across sessions
+@st.cache_resource(show_spinner=False)
+def get_agents(api_key):
+    """Builds the shared TutorAgents instance on first use."""
+    return create_agents(api_key)
+
+agents = get_agents(api_key)
+
+# Optional index shared by every session so users rarely get the same question
+@st.cache_resource(show_spinner=False)
+def get_global_question_index():
+    """Builds the process-wide question index when GLOBAL_QUESTION_DEDUP is set."""
+    if os.getenv("GLOBAL_QUESTION_DEDUP", "").lower() in ("1", "true", "yes"):
+        return QuestionIndex(max_entries=int(os.getenv("GLOBAL_QUESTION_DEDUP_MAX", 50000)))
+    return None
+
+# Durable store of session snapshots and progress, shared by every session in the process
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    """Opens the session store unless SESSION_STORE_PATH is set to an empty value."""
+    path = os.getenv("SESSION_STORE_PATH", DEFAULT_STORE_PATH)
+    return SessionStore(path) if path else None
+
+store = get_session_store()
+
+# Session state that is checkpointed; the summary, dedup index and interview history are rebuilt from it
+PERSISTED_KEYS = [
+    "lesson_content", "lesson_topic", "raw_mcq_text", "mcq_questions", "mcq_answers", "mcq_feedback", "mcq_score",
+    "current_interview_question", "interview_started", "current_difficulty", "interview_in_progress",
+    "interview_mode", "overall_performance", "round_questions", "round_size", "round_time_limit",
+    "round_number", "round_started", "last_round_summary",
+]
+
+# The session id lives in the URL so a refresh, restart or another replica resumes the same session
+session_id = st.query_params.get("session")
+if not session_id:
+    session_id = uuid.uuid4().hex
+    st.query_params["session"] = session_id
+
+
+def restore_session(state):
+    """Loads a checkpointed session into st.session_state.
+
+    Takes time linear in the current interview, whose answers are read back
+    from the progress events and re-indexed.
+    """
+    for key in PERSISTED_KEYS:
+        if key in state:
+            st.session_state[key] = state[key]
+    # JSON turned the answer indexes into strings
+    st.session_state.mcq_answers = {int(i): answer for i, answer in state.get("mcq_answers", {}).items()}
+    if "performance_summary" in state:
+        st.session_state.performance_summary = PerformanceSummary.from_state(state["performance_summary"])
+    st.session_state.checkpointed = {key: json.dumps(value, sort_keys=True) for key, value in state.items()}
+    
+    # The answers of the current interview are read back from the progress events
+    st.session_state.interview_history = store.interview_history(session_id, state.get("interview_started"))
+    
+    # Attached afterwards so that every refresh does not add these questions to the global index again
+    question_index = QuestionIndex()
+    asked = [entry["question"] for entry in st.session_state.interview_history]
+    asked += state.get("round_questions", []) + [state.get("current_interview_question", "")]
+    for question in asked:
+        if question:
+            question_index.add(question)
+    question_index.parent = get_global_question_index()
+    st.session_state.question_index = question_index
+
+
+def checkpoint_session(events=()):
+    """Saves the session state that changed since the last checkpoint and appends its new progress events."""
+    if store is None:
+        return
+    state = {key: st.session_state[key] for key in PERSISTED_KEYS if key in st.session_state}
+    state["performance_summary"] = st.session_state.performance_summary.state()
+    dumped = {key: json.dumps(value, sort_keys=True) for key, value in state.items()}
+    checkpointed = st.session_state.setdefault("checkpointed", {})
+    changed = {key: state[key] for key in state if checkpointed.get(key) != dumped[key]}
+    store.checkpoint(session_id, st.session_state.user_id, changed, events)
+    checkpointed.update(dumped)
+    st.session_state.progress_version = st.session_state.get("progress_version", 0) + 1
+
+
+# Reruns of the Progress tab reuse the last query results until this session checkpoints again
+@st.cache_data(ttl=60, max_entries=1000, show_spinner=False)
+def load_progress(user_id, version):
+    """Runs the Progress tab's queries for a user; version changes whenever this session saves new progress."""
+    return {
+        "progress": store.progress(user_id),
+        "ratings": [event["rating"] for event in store.events(user_id, kind=INTERVIEW, limit=500)],
+        "sessions": store.recent_sessions(user_id),
+    }
+
+
+if "user_id" not in st.session_state:
+    saved = store.load(session_id) if store is not None else None
+    if saved is not None:
+        restore_session(saved[1])
+    # Progress is keyed on an unguessable key carried in the URL, a session keeping the owner it was saved with
+    if saved is not None:
+        st.session_state.user_id = saved[0]
+    elif is_user_id(st.query_params.get("user")):
+        st.session_state.user_id = st.query_params["user"]
+    else:
+        st.session_state.user_id = new_user_id()
+    st.query_params["user"] = st.session_state.user_id
 
 # Initialize session state variables
 if "lesson_content" not in st.session_state:
@@ -162,6 +145,10 @@ if "mcq_answers" not in st.session_state:
     st.session_state.mcq_answers = {}
 if "mcq_feedback" not in st.session_state:
     st.session_state.mcq_feedback = ""
+if "mcq_score" not in st.session_state:
+    st.session_state.mcq_score = None
+if "lesson_topic" not in st.session_state:
+    st.session_state.lesson_topic = ""
 if "current_interview_question" not in st.session_state:
     st.session_state.current_interview_question = ""
 if "interview_history" not in st.session_state:
@@ -174,19 +161,51 @@ if "overall_performance" not in st.session_state:
     st.session_state.overall_performance = ""
 if "current_answer" not in st.session_state:
     st.session_state.current_answer = ""
+if "performance_summary" not in st.session_state:
+    st.session_state.performance_summary = PerformanceSummary()
+if "question_index" not in st.session_state:
+    st.session_state.question_index = QuestionIndex(parent=get_global_question_index())
+if "interview_mode" not in st.session_state:
+    st.session_state.interview_mode = "One question at a time"
+
+
+def start_timed_round(subject, interview_topic):
+    """Draws a new round of questions at the current difficulty and starts its clock."""
+    st.session_state.round_questions = generate_round_questions(
+        agents, subject, interview_topic, st.session_state.current_difficulty,
+        st.session_state.round_size, st.session_state.question_index)
+    st.session_state.round_number += 1
+    st.session_state.round_started = time.time()
+
 
 # Sidebar for user input
 with st.sidebar:
     st.header("Setup")
+    st.caption(f"Your progress key: `{st.session_state.user_id}`. Keep it private, anyone with it can see your progress.")
+    linked_key = st.text_input(
+        "**Progress key from another device (optional):**",
+        help="Paste the key shown on another device to track your progress there and here together.").strip()
+    if linked_key and linked_key != st.session_state.user_id:
+        if is_user_id(linked_key):
+            st.session_state.user_id = linked_key
+            st.query_params["user"] = linked_key
+            checkpoint_session()
+        else:
+            st.error("That is not a progress key.")
     subject = st.text_input("**Enter the subject:**")
     topic = st.text_input("**Enter a specific topic:**")
     st.divider()
     st.header("Settings")
     num_mcqs = st.number_input("Number of MCQs:", min_value=1, max_value=20, value=5, step=1)
     initial_difficulty = st.selectbox("Initial Interview Difficulty:", ["Easy", "Medium", "Hard"], index=1)
+    fresh_content = st.checkbox("Give me fresh content", help="Skip cached lessons and MCQs and generate new ones.")
 
 # Main tabs
-tab1, tab2, tab3, tab4 = st.tabs(["📚 Lesson", "📝 MCQ Practice", "🎯 Interview Practice", "📊 Overall Performance"])
+tab_names = ["📚 Lesson", "📝 MCQ Practice", "🎯 Interview Practice", "📊 Overall Performance", "📈 Progress"]
+show_admin = os.getenv("COACH_ADMIN", "").lower() in ("1", "true", "yes")
+if show_admin:
+    tab_names.append("🛠️ Admin")
+tab1, tab2, tab3, tab4, tab5, *admin_tab = st.tabs(tab_names)
 
 # Tab 1: Lesson Generation
 with tab1:
@@ -198,13 +217,14 @@ with tab1:
         else:
             # If topic is empty, we'll just use the subject as the general area
             lesson_topic = topic if topic.strip() else subject
-            with st.spinner("Generating structured lesson..."):
-                lesson = agents.generate_lesson(subject, lesson_topic)
-                if lesson:
-                    st.session_state.lesson_content = lesson
-                    st.write(lesson)
-                else:
-                    st.error("Failed to generate a lesson.")
+            st.session_state.lesson_topic = lesson_topic
+            # Streaming the lesson so it renders as it is written
+            lesson = st.write_stream(agents.generate_lesson(subject, lesson_topic, stream=True, fresh=fresh_content))
+            if lesson:
+                st.session_state.lesson_content = lesson
+                checkpoint_session()
+            else:
+                st.error("Failed to generate a lesson.")
 
 # Tab 2: MCQ Practice
 with tab2:
@@ -215,50 +235,37 @@ with tab2:
         if not st.session_state.lesson_content:
             st.error("Please generate a lesson first.")
         else:
+            # Streaming every lesson section in parallel and previewing each finished question
+            generator = SectionedMCQGenerator(agents, st.session_state.lesson_content, num_mcqs, fresh=fresh_content)
+            preview = st.empty()
+            preview_box = preview.container()
+            
             with st.spinner("Generating MCQs based on the lesson..."):
-                mcq_text = agents.generate_mcqs_from_lesson(st.session_state.lesson_content, num_mcqs)
+                try:
+                    for section, question in generator.iter_questions():
+                        with preview_box:
+                            st.caption(section)
+                            st.markdown(f"### {question['text']}")
+                            for option in question['options']:
+                                st.markdown(option)
+                    questions = generator.result()
+                except BaseException:
+                    # A rerun or stop mid-preview must not leave the section calls streaming
+                    generator.cancel()
+                    raise
+            
+            # The full answerable list is rendered below
+            preview.empty()
+            
+            if questions:
+                st.session_state.raw_mcq_text = format_mcqs(questions)
                 
-                if mcq_text:
-                    st.session_state.raw_mcq_text = mcq_text
-                    
-                    # Parsing the MCQs
-                    questions = []
-                    current_question = None
-                    
-                    lines = mcq_text.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        
-                        # Looking for a new question
-                        if line.startswith('Q') and len(line) > 1 and line[1:].strip()[0].isdigit():
-                            # Saving the previous question
-                            if current_question and 'text' in current_question:
-                                questions.append(current_question)
-                            
-                            # Starting a new question
-                            current_question = {
-                                'text': line,
-                                'options': [],
-                                'correct': None
-                            }
-                        
-                        # Looking for options
-                        elif line.startswith(('A)', 'B)', 'C)', 'D)')) and current_question:
-                            current_question['options'].append(line)
-                        
-                        # Looking for correct answer
-                        elif line.startswith('Correct Answer:') and current_question:
-                            current_question['correct'] = line.split(':')[1].strip()
-                    
-                    # Adding the last question
-                    if current_question and 'text' in current_question and current_question['options']:
-                        questions.append(current_question)
-                    
-                    # Storing in session state
-                    st.session_state.mcq_questions = questions
-                    st.session_state.mcq_answers = {i: None for i in range(len(questions))}
+                # Storing in session state
+                st.session_state.mcq_questions = questions
+                st.session_state.mcq_answers = {i: None for i in range(len(questions))}
+                checkpoint_session()
+            else:
+                st.error("Failed to generate MCQs.")
     
     # Display MCQs
     if st.session_state.mcq_questions:
@@ -281,38 +288,47 @@ with tab2:
             
             st.markdown("---")
         
+        explain_misses = st.checkbox("Explain wrong answers with AI", value=True)
+        
         # Submit MCQ Answers
         if st.button("Submit MCQ Answers"):
-            with st.spinner("⏳ Evaluating your answers..."):
-                # Preparing detailed information for evaluation
-                evaluation_text = "Here are the MCQs and the user's answers:\n\n"
-                
-                for i, q in enumerate(st.session_state.mcq_questions):
-                    evaluation_text += f"{q['text']}\n"
-                    for option in q['options']:
-                        evaluation_text += f"{option}\n"
-                    
-                    if 'correct' in q and q['correct']:
-                        evaluation_text += f"Correct Answer: {q['correct']}\n\n"
-                    
-                    user_ans = st.session_state.mcq_answers[i]
-                    evaluation_text += f"User's Answer: {user_ans}\n\n"
-                
-                # Sending for evaluation
-                feedback_mcq = agents.evaluate_mcq_answers(evaluation_text)
-                
-                if feedback_mcq:
-                    st.session_state.mcq_feedback = feedback_mcq
-                    st.subheader("📊 MCQ Feedback & Evaluation")
-                    st.write(feedback_mcq)
+            # Grading locally against the parsed correct answers
+            default_topic = st.session_state.lesson_topic or "General"
+            score = score_mcqs(st.session_state.mcq_questions, st.session_state.mcq_answers, default_topic)
+            st.session_state.mcq_score = score
+            st.session_state.performance_summary.add_mcq_score(score)
+            
+            st.subheader("📊 MCQ Feedback & Evaluation")
+            feedback_mcq = format_score_report(score)
+            st.markdown(feedback_mcq)
+            
+            # Asking the LLM only about the missed questions
+            misses = missed_questions(st.session_state.mcq_questions, score)
+            if explain_misses and misses:
+                st.subheader("💡 Explanations for missed questions")
+                explanations = st.write_stream(agents.evaluate_mcq_answers(format_misses_for_review(misses), stream=True))
+                if explanations:
+                    feedback_mcq += f"\n\n{explanations}"
                 else:
-                    st.error("Failed to evaluate your answers. Please try again.")
+                    st.error("Failed to explain your missed answers. Please try again.")
+            
+            st.session_state.mcq_feedback = feedback_mcq
+            checkpoint_session([{
+                "kind": MCQ, "subject": subject, "topic": default_topic,
+                "correct": score["score"], "total": score["total"], "payload": score["topics"]}])
 
 # Tab 3: Interview Practice
 with tab3:
     st.header("🎯 Interview Practice")
     
     if not st.session_state.interview_in_progress:
+        interview_mode = st.radio(
+            "Interview mode:", ["One question at a time", "Timed round"], horizontal=True,
+            help="A timed round asks several questions at once and scores all answers together.")
+        if interview_mode == "Timed round":
+            round_size = st.number_input("Questions per round:", min_value=2, max_value=10, value=5, step=1)
+            time_limit = st.number_input("Time limit (minutes):", min_value=1, max_value=60, value=10, step=1)
+        
         # Start interview button
         if st.button("Start Interview Practice"):
             if not subject.strip():
@@ -321,40 +337,118 @@ with tab3:
                 # If topic is empty, we'll just use the subject as the general area
                 interview_topic = topic if topic.strip() else subject
                 st.session_state.interview_in_progress = True
+                st.session_state.interview_mode = interview_mode
                 st.session_state.current_difficulty = initial_difficulty
                 st.session_state.interview_history = []
+                st.session_state.interview_started = time.time()
+                # The report covers this interview only, alongside the session's MCQ attempts
+                st.session_state.performance_summary.reset_interviews()
                 st.session_state.current_answer = ""
                 
-                # Generate the first question
-                with st.spinner("Generating first interview question..."):
-                    question = agents.generate_next_interview_question(subject, interview_topic, st.session_state.current_difficulty)
-                    st.session_state.current_interview_question = question
+                if interview_mode == "Timed round":
+                    st.session_state.round_size = round_size
+                    st.session_state.round_time_limit = time_limit
+                    st.session_state.round_number = 0
+                    st.session_state.last_round_summary = ""
+                    with st.spinner("Generating the first round of questions..."):
+                        start_timed_round(subject, interview_topic)
+                else:
+                    # Generate the first question
+                    with st.spinner("Generating first interview question..."):
+                        question = agents.generate_next_interview_question(subject, interview_topic, st.session_state.current_difficulty, question_index=st.session_state.question_index)
+                        st.session_state.current_interview_question = question
+                checkpoint_session()
                 st.rerun()
     else:
-        # Display current question
-        st.subheader("Current Question:")
-        st.write(st.session_state.current_interview_question)
-        
-        # User answer
-        # User answer - using session state to maintain/clear value appropriately
-        user_answer = st.text_area("Your Answer:", value=st.session_state.current_answer, height=200, key="answer_input")
-        
-        # Submit answer
-        if st.button("Submit Answer"):
-            if not user_answer.strip():
-                st.error("Please provide an answer before submitting.")
+        if st.session_state.interview_mode == "Timed round":
+            if st.session_state.last_round_summary:
+                st.info(st.session_state.last_round_summary)
+            
+            questions = st.session_state.round_questions
+            st.subheader(f"Round {st.session_state.round_number} ({st.session_state.current_difficulty}, {len(questions)} questions)")
+            time_left = st.session_state.round_started + st.session_state.round_time_limit * 60 - time.time()
+            if time_left > 0:
+                st.caption(f"Time limit: {st.session_state.round_time_limit} min, about {int(time_left // 60)}:{int(time_left % 60):02d} left at the last refresh.")
             else:
-                with st.spinner("Evaluating your answer..."):
-                    feedback = agents.evaluate_answer(st.session_state.current_interview_question, user_answer)
+                st.warning("Time is up, submit your answers.")
+            
+            # Answer keys are per round so the boxes start empty every round
+            answers = [
+                st.text_area(f"**Q{i+1}.** {question}", key=f"round_{st.session_state.round_number}_answer_{i}", height=150)
+                for i, question in enumerate(questions)
+            ]
+            
+            # Submit the whole round
+            if st.button("Submit Round"):
+                if not any(answer.strip() for answer in answers):
+                    st.error("Please answer at least one question before submitting.")
+                else:
+                    elapsed = time.time() - st.session_state.round_started
+                    
+                    # All answers are scored in one batched call per few questions
+                    with st.spinner("Evaluating your answers..."):
+                        results = evaluate_round(agents, questions, answers)
+                    
+                    interview_topic = topic.strip() or subject
+                    events = []
+                    for question, answer, result in zip(questions, answers, results):
+                        st.session_state.interview_history.append({
+                            "question": question,
+                            "answer": answer,
+                            "feedback": result["feedback"],
+                            "rating": result["rating"],
+                            "difficulty": st.session_state.current_difficulty
+                        })
+                        st.session_state.performance_summary.add_interview(
+                            result["rating"], st.session_state.current_difficulty, result["feedback"], interview_topic)
+                        events.append({
+                            "kind": INTERVIEW, "subject": subject, "topic": interview_topic,
+                            "difficulty": st.session_state.current_difficulty, "rating": result["rating"],
+                            "payload": {"question": question, "answer": answer, "feedback": result["feedback"]}})
+                    
+                    ratings = [result["rating"] for result in results]
+                    over_time = " (over the time limit)" if elapsed > st.session_state.round_time_limit * 60 else ""
+                    st.session_state.last_round_summary = (
+                        f"Round {st.session_state.round_number}: average rating {sum(ratings) / len(ratings):.1f}/5 "
+                        f"in {int(elapsed // 60)}:{int(elapsed % 60):02d}{over_time}. See the history below for feedback.")
+                    
+                    # Adjust difficulty on the round's average rating and start the next round
+                    st.session_state.current_difficulty = round_difficulty(st.session_state.current_difficulty, ratings)
+                    try:
+                        with st.spinner("Generating the next round of questions..."):
+                            start_timed_round(subject, interview_topic)
+                    finally:
+                        # The graded round is saved even if the next one fails
+                        checkpoint_session(events)
+                    st.rerun()
+        else:
+            # Display current question
+            st.subheader("Current Question:")
+            st.write(st.session_state.current_interview_question)
+            
+            # User answer
+            # User answer - using session state to maintain/clear value appropriately
+            user_answer = st.text_area("Your Answer:", value=st.session_state.current_answer, height=200, key="answer_input")
+            
+            # Submit answer
+            if st.button("Submit Answer"):
+                if not user_answer.strip():
+                    st.error("Please provide an answer before submitting.")
+                else:
+                    # Prefetching candidate next questions while the answer is evaluated
+                    prefetcher = QuestionPrefetcher(agents, subject, topic, st.session_state.current_difficulty, st.session_state.question_index)
+                    
+                    # Streaming the feedback as the evaluation is written; Streamlit's rerun and stop
+                    # exceptions are BaseExceptions, and the candidates must be dropped on those too
+                    st.subheader("Feedback:")
+                    try:
+                        feedback = st.write_stream(agents.evaluate_answer(st.session_state.current_interview_question, user_answer, stream=True))
+                    except BaseException:
+                        prefetcher.cancel()
+                        raise
                     
                     # Extract rating from feedback
-                    rating = 3  # Default rating
-                    if "Rating:" in feedback:
-                        try:
-                            rating_text = feedback.split("Rating:")[1].split("\n")[0].strip()
-                            rating = int(rating_text.split("/")[0].strip())
-                        except:
-                            pass
+                    rating = parse_rating(feedback)
                     
                     # Store the Q&A in history
                     st.session_state.interview_history.append({
@@ -364,35 +458,38 @@ with tab3:
                         "rating": rating,
                         "difficulty": st.session_state.current_difficulty
                     })
+                    st.session_state.performance_summary.add_interview(
+                        rating, st.session_state.current_difficulty, feedback, topic.strip() or subject)
+                    event = {
+                        "kind": INTERVIEW, "subject": subject, "topic": topic.strip() or subject,
+                        "difficulty": st.session_state.current_difficulty, "rating": rating,
+                        "payload": {"question": st.session_state.current_interview_question, "answer": user_answer, "feedback": feedback}}
                     
                     # Clear user answer
                     st.session_state.current_answer = ""  # Ensure answer is cleared
 
-                    # Display feedback
-                    st.subheader("Feedback:")
-                    st.write(feedback)
-                    
                     # Adjust difficulty based on rating
-                    difficulties = ["Easy", "Medium", "Hard"]
-                    current_index = difficulties.index(st.session_state.current_difficulty)
+                    st.session_state.current_difficulty = next_difficulty(st.session_state.current_difficulty, rating)
                     
-                    if rating >= 4 and current_index < 2:
-                        st.session_state.current_difficulty = difficulties[current_index + 1]
-                    elif rating <= 2 and current_index > 0:
-                        st.session_state.current_difficulty = difficulties[current_index - 1]
-                    
-                    # Generate the next interview question
-                    with st.spinner("Generating next interview question..."):
-                        next_question = agents.generate_next_interview_question(subject, topic, st.session_state.current_difficulty)
-                        st.session_state.current_interview_question = next_question
+                    # Pick up the prefetched question for the new difficulty
+                    try:
+                        with st.spinner("Generating next interview question..."):
+                            next_question = prefetcher.take(st.session_state.current_difficulty)
+                            st.session_state.current_interview_question = next_question
+                    finally:
+                        # Dropping the candidates if the spinner was interrupted before the take,
+                        # and saving the rated answer even if the next question fails
+                        prefetcher.cancel()
+                        checkpoint_session([event])
 
                     # Force re-run to refresh the text area
                     st.rerun()
 
-        
+            
         # Option to end interview
         if st.button("End Interview"):
             st.session_state.interview_in_progress = False
+            checkpoint_session()
             st.success("Interview completed. Check the Overall Performance tab for your results.")
             st.rerun()
         
@@ -410,33 +507,91 @@ with tab4:
     st.header("📊 Overall Performance")
     
     if st.button("Generate Overall Performance Report"):
-        if not st.session_state.mcq_feedback and not st.session_state.interview_history:
+        summary = st.session_state.performance_summary
+        if not summary.mcq_attempts and not summary.interview_count:
             st.error("Complete at least one MCQ test or interview question before generating a report.")
         else:
-            with st.spinner("Analyzing your overall performance..."):
-                # Prepare MCQ results
-                mcq_results = st.session_state.mcq_feedback if st.session_state.mcq_feedback else "No MCQ data available."
-                
-                # Prepare interview results
-                interview_results = "No interview data available."
-                if st.session_state.interview_history:
-                    interview_results = "Interview Questions Summary:\n\n"
-                    for i, qa in enumerate(st.session_state.interview_history):
-                        interview_results += f"Question {i+1} ({qa['difficulty']}):\n"
-                        interview_results += f"Question: {qa['question']}\n"
-                        interview_results += f"Rating: {qa['rating']}/5\n\n"
-                
-                # Generate overall performance report
-                overall_report = agents.get_overall_performance(mcq_results, interview_results)
-                st.session_state.overall_performance = overall_report
-                
-                # Display report
-                st.subheader("📑 Overall Performance Report")
-                st.write(overall_report)
-    
+            # The running summary keeps the report prompt the same size however long the session
+            mcq_results = summary.mcq_results()
+            interview_results = summary.interview_results()
+            
+            # Generate overall performance report, streamed as it is written
+            st.subheader("📑 Overall Performance Report")
+            overall_report = st.write_stream(agents.get_overall_performance(mcq_results, interview_results, stream=True))
+            st.session_state.overall_performance = overall_report
+            checkpoint_session([{"kind": REPORT, "payload": {"report": overall_report}}])
+
     # Display existing report if available
     elif st.session_state.overall_performance:
         st.subheader("📑 Overall Performance Report")
         st.write(st.session_state.overall_performance)
     else:
         st.info("Complete MCQ tests and interview questions, then generate a report to see your overall performance.")
+
+# Tab 5: Progress across sessions, straight from the session store without any LLM call
+with tab5:
+    st.header("📈 Progress")
+    
+    if store is None:
+        st.info("Progress tracking is off because SESSION_STORE_PATH is empty.")
+    else:
+        loaded = load_progress(st.session_state.user_id, st.session_state.get("progress_version", 0))
+        progress, ratings = loaded["progress"], loaded["ratings"]
+        
+        if not ratings and not progress["daily_mcqs"]:
+            st.info("Answer interview questions or MCQs to start tracking your progress.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Sessions", progress["sessions"])
+            col2.metric("Answers rated", sum(day["answers"] for day in progress["daily_ratings"]))
+            col3.metric("Average of last 10", f"{sum(ratings[-10:]) / len(ratings[-10:]):.1f}/5" if ratings else "-")
+            
+            if ratings:
+                st.subheader("Interview ratings")
+                rolling = [sum(ratings[max(0, i - 4):i + 1]) / len(ratings[max(0, i - 4):i + 1]) for i in range(len(ratings))]
+                st.line_chart({"Rating": ratings, "Average of last 5": rolling})
+            
+            if len(progress["daily_ratings"]) > 1:
+                st.subheader("Average rating by day")
+                st.line_chart(progress["daily_ratings"], x="day", y="average_rating")
+            
+            if progress["daily_mcqs"]:
+                st.subheader("MCQ accuracy by day")
+                st.bar_chart(progress["daily_mcqs"], x="day", y="accuracy")
+            
+            if progress["topics"]:
+                st.subheader("Topics, weakest first")
+                st.dataframe(progress["topics"], use_container_width=True)
+        
+        # Links back into earlier sessions of the same user
+        sessions = [(sid, updated) for sid, updated in loaded["sessions"] if sid != session_id]
+        if sessions:
+            st.subheader("Resume a session")
+            for sid, updated in sessions:
+                params = {"session": sid, "user": st.session_state.user_id}
+                st.markdown(f"- [{time.strftime('%Y-%m-%d %H:%M', time.localtime(updated))}](?{urlencode(params)})")
+
+# Tab 6: Admin metrics, only when COACH_ADMIN is set
+if show_admin:
+    with admin_tab[0]:
+        st.header("🛠️ Agent Metrics")
+        st.caption("Process-wide numbers since startup. Tokens from blocking calls are estimated.")
+        
+        rows = agents.metrics.snapshot()
+        if rows:
+            st.dataframe(rows, use_container_width=True)
+        else:
+            st.info("No agent calls recorded yet.")
+        
+        with st.expander("Prometheus metrics"):
+            st.code(agents.metrics.render_prometheus(), language="text")
+
+# Loading the LLM client libraries in the background once the first page has rendered
+@st.cache_resource(show_spinner=False)
+def warm_up_backend():
+    """Starts loading the backend's client libraries, once per process."""
+    thread = threading.Thread(target=agents.backend.warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+warm_up_backend()
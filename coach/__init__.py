@@ -0,0 +1,6 @@
+"""Reusable building blocks for the Interview Preparation Coach."""
+
+from coach.parsing import MCQStreamParser, parse_mcqs
+from coach.scoring import score_mcqs
+
+__all__ = ["MCQStreamParser", "parse_mcqs", "score_mcqs"]
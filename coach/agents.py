@@ -0,0 +1,351 @@
+"""The agents behind the coach and their prompts."""
+
+import logging
+import os
+import time
+
+from coach.backends import FakeBackend, GroqBackend
+from coach.bank import DEFAULT_BANK_PATH, QuestionBank
+from coach.cache import ContentCache
+from coach.metrics import MetricsRecorder, estimate_tokens
+from coach.parsing import format_mcqs
+from coach.scheduler import INTERACTIVE, Cancelled, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+# Rough completion sizes used to reserve tokens/min budget before a call
+COMPLETION_TOKEN_ESTIMATES = {
+    "lesson_agent": 1500,
+    "mcq_agent": 1200,
+    "mcq_feedback_agent": 800,
+    "interview_agent": 100,
+    "feedback_agent": 400,
+    "batch_feedback_agent": 1600,
+    "performance_agent": 800,
+}
+
+# Completion tokens per generated MCQ, so sectioned calls reserve only their share
+MCQ_COMPLETION_TOKENS = 60
+
+
+# Creating Different Agents
+class TutorAgents:
+    def __init__(self, api_key=None, cache=None, bank=None, scheduler=None, metrics=None, backend=None):
+        self.api_key = api_key
+        self.cache = cache
+        self.bank = bank
+        self.scheduler = scheduler
+        self.metrics = metrics if metrics is not None else MetricsRecorder()
+        self.backend = backend if backend is not None else GroqBackend(api_key)
+        self.model = self.backend.model
+
+        # Lesson Generator
+        self.lesson_agent = self.backend.create_agent(
+            name="lesson_agent",
+            system_message="Create detailed structured learning modules on the given topic. Ensure the lesson includes an introduction, key concepts, examples, and a summary. DO NOT include your thought process, just the lesson content."
+        )
+
+        # MCQs Generator (now takes lesson content as input)
+        self.mcq_agent = self.backend.create_agent(
+            name="mcq_agent",
+            system_message="Generate multiple-choice questions (MCQs) based on the provided lesson content. Follow this exact format for each question:\n\nQ1. [Question text]\nA) [Option A]\nB) [Option B]\nC) [Option C]\nD) [Option D]\n\nCorrect Answer: [Letter]\n\nEach question must be numbered with Q followed by the number. Each option must start with a capital letter followed by a parenthesis. DO NOT include explanations or additional text."
+        )
+
+        # MCQs Feedback Agent
+        self.mcq_feedback_agent = self.backend.create_agent(
+            name="mcq_feedback_agent",
+            system_message="Explain the MCQs the user answered incorrectly. The score has already been computed, so do not recompute it. For each question explain why the correct option is right, why the user's choice is wrong, and suggest what to review."
+        )
+
+        # Interview Question Generator (now with realistic questions)
+        self.interview_agent = self.backend.create_agent(
+            name="interview_agent",
+            system_message="Generate a realistic interview question for the given topic, considering the specified difficulty level. Ask questions that are commonly asked in actual job interviews - focus on conceptual understanding, problem-solving approaches, past experiences, behavioral scenarios, or industry trends rather than coding exercises. If the user's previous performance is provided, adjust the difficulty accordingly."
+        )
+
+        # Feedback Agent - update this system message
+        self.feedback_agent = self.backend.create_agent(
+            name="feedback_agent",
+            system_message="Evaluate the user's answer as if it were given in a real interview setting. Consider communication skills, clarity, technical accuracy, and how well they demonstrate understanding of the subject. Provide constructive feedback that focuses on both strengths and areas for improvement, similar to what an interviewer would consider. Return a rating from 1-5, where 1 is poor and 5 is excellent. Format your response like this: 'Rating: X/5\n\nFeedback: [Your detailed feedback here]'"
+        )
+
+        # Batch Feedback Agent - scores a whole timed round in one reply
+        self.batch_feedback_agent = self.backend.create_agent(
+            name="batch_feedback_agent",
+            system_message="Evaluate each of the user's numbered answers as if they were given in a real interview setting. Consider communication skills, clarity, technical accuracy, and how well they demonstrate understanding of the subject. Provide constructive feedback that focuses on both strengths and areas for improvement. Rate every answer from 1-5, where 1 is poor and 5 is excellent, and answer an empty or missing answer with a 1. Return one block per answer, in order, formatted exactly like this:\n\nAnswer 1:\nRating: X/5\n\nFeedback: [Your feedback for answer 1]\n\nAnswer 2:\nRating: X/5\n\nFeedback: [Your feedback for answer 2]"
+        )
+
+        # Overall Performance Agent
+        self.performance_agent = self.backend.create_agent(
+            name="performance_agent",
+            system_message="Analyze the user's overall performance across both MCQs and interview questions. Provide a comprehensive evaluation highlighting strengths, areas for improvement, and specific recommendations for further study. Include quantitative metrics where available."
+        )
+
+    def _cache_key(self, agent, content, use_cache):
+        """Returns the content cache key for a call, or None when caching is off."""
+        if self.cache is None or use_cache is None:
+            return None
+        return self.cache.make_key(agent.name, content, self.model, agent.system_message)
+
+    def _estimate_tokens(self, agent, content, completion_tokens=None):
+        """Estimates prompt plus completion tokens at roughly four characters per token."""
+        if completion_tokens is None:
+            completion_tokens = COMPLETION_TOKEN_ESTIMATES.get(agent.name, 500)
+        return (len(agent.system_message) + len(content)) // 4 + completion_tokens
+
+    def _reply(self, agent, content, fallback, use_cache=None, priority=INTERACTIVE, cancel_event=None,
+               completion_tokens=None):
+        """Runs a single blocking completion and returns its text.
+
+        use_cache=True reads and writes the content cache, use_cache=False skips
+        the read but still refreshes the entry, None bypasses the cache entirely.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(agent, content, use_cache)
+        if key and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.record(agent.name, time.perf_counter() - start, cache_hit=True)
+                return cached
+
+        def complete():
+            return self.backend.complete(agent, content)
+
+        try:
+            if self.scheduler is not None:
+                response = self.scheduler.call(
+                    complete, priority, self._estimate_tokens(agent, content, completion_tokens), cancel_event)
+            else:
+                response = complete()
+        except Cancelled:
+            self.metrics.record(agent.name, time.perf_counter() - start, cancelled=True)
+            raise
+        except Exception as exc:
+            self.metrics.record(agent.name, time.perf_counter() - start, error=type(exc).__name__)
+            raise
+        reply = response or fallback
+
+        # Blocking replies do not report per-call usage, so tokens are estimated
+        self.metrics.record(
+            agent.name, time.perf_counter() - start,
+            prompt_tokens=estimate_tokens(agent.system_message) + estimate_tokens(content),
+            completion_tokens=estimate_tokens(reply))
+
+        if key and reply and reply != fallback:
+            self.cache.put(key, agent.name, self.model, reply)
+        return reply
+
+    def _stream(self, agent, content, use_cache=None, priority=INTERACTIVE, cancel_event=None, completion_tokens=None):
+        """Yields the agent's reply chunk by chunk as the backend produces it."""
+        start = time.perf_counter()
+        key = self._cache_key(agent, content, use_cache)
+        if key and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                elapsed = time.perf_counter() - start
+                self.metrics.record(agent.name, elapsed, ttft=elapsed, cache_hit=True)
+                yield cached
+                return
+
+        # Filled by backends that report exact usage, e.g. Groq on its final chunk
+        usage = {}
+
+        def open_stream():
+            return self.backend.stream(agent, content, usage)
+
+        if self.scheduler is not None:
+            deltas = self.scheduler.stream(
+                open_stream, priority, self._estimate_tokens(agent, content, completion_tokens), cancel_event)
+        else:
+            deltas = open_stream()
+
+        chunks = []
+        ttft = None
+        try:
+            for delta in deltas:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                chunks.append(delta)
+                yield delta
+        except Cancelled:
+            self.metrics.record(agent.name, time.perf_counter() - start, ttft=ttft, cancelled=True)
+            raise
+        except Exception as exc:
+            self.metrics.record(agent.name, time.perf_counter() - start, ttft=ttft, error=type(exc).__name__)
+            raise
+
+        reply = "".join(chunks)
+        self.metrics.record(
+            agent.name, time.perf_counter() - start, ttft=ttft,
+            prompt_tokens=usage.get("prompt_tokens", estimate_tokens(agent.system_message) + estimate_tokens(content)),
+            completion_tokens=usage.get("completion_tokens", estimate_tokens(reply)))
+
+        # Only completed streams are cached
+        if key and chunks:
+            self.cache.put(key, agent.name, self.model, reply)
+
+    def generate_lesson(self, subject, topic, stream=False, fresh=False, priority=INTERACTIVE):
+        """Generates a structured lesson plan, served from the content cache unless fresh."""
+        # If topic is empty, create a lesson about the general subject
+        content = f"Create a detailed lesson plan on {topic} for {subject}." if topic else f"Create a detailed lesson plan on {subject}."
+        
+        # Serving a pre-generated lesson from the question bank first
+        if self.bank is not None and not fresh:
+            lesson = self.bank.get_lesson(subject, topic)
+            if lesson:
+                self.metrics.record(self.lesson_agent.name, 0.0, cache_hit=True)
+                return iter([lesson]) if stream else lesson
+        
+        if stream:
+            return self._stream(self.lesson_agent, content, use_cache=not fresh, priority=priority)
+        return self._reply(self.lesson_agent, content, "Lesson generation failed!", use_cache=not fresh, priority=priority)
+
+    def generate_mcqs_from_lesson(self, lesson_content, num_questions, stream=False, fresh=False, priority=INTERACTIVE,
+                                  cancel_event=None):
+        """Generates MCQs based on the lesson content, served from the content cache unless fresh."""
+        content = f"Generate {num_questions} DIFFERENT MCQs based on the following lesson content. Ensure these questions are diverse and cover various aspects of the material:\n\n{lesson_content}"
+        
+        # Serving the banked MCQ set built from this exact lesson first
+        mcqs = None if fresh else self.get_banked_mcqs(lesson_content, num_questions)
+        if mcqs:
+            mcq_text = format_mcqs(mcqs)
+            return iter([mcq_text]) if stream else mcq_text
+        
+        # Reserving completion tokens for the questions asked for, not a whole quiz
+        completion_tokens = MCQ_COMPLETION_TOKENS * num_questions
+        if stream:
+            return self._stream(self.mcq_agent, content, use_cache=not fresh, priority=priority,
+                                cancel_event=cancel_event, completion_tokens=completion_tokens)
+        return self._reply(self.mcq_agent, content, "MCQ generation failed!", use_cache=not fresh, priority=priority,
+                           cancel_event=cancel_event, completion_tokens=completion_tokens)
+
+    def get_banked_mcqs(self, lesson_content, num_questions):
+        """Returns num_questions banked MCQs built from this exact lesson, or None."""
+        if self.bank is None:
+            return None
+        mcqs = self.bank.get_mcqs(lesson_content, num_questions)
+        if mcqs:
+            self.metrics.record(self.mcq_agent.name, 0.0, cache_hit=True)
+        return mcqs
+
+    def evaluate_mcq_answers(self, user_answers, stream=False):
+        """Explains the user's missed MCQ answers."""
+        content = f"Explain these missed MCQ answers: {user_answers}"
+        
+        if stream:
+            return self._stream(self.mcq_feedback_agent, content)
+        return self._reply(self.mcq_feedback_agent, content, "Evaluation failed!")
+
+    def generate_next_interview_question(self, subject, topic, current_difficulty, previous_performance=None, question_index=None, record=True, max_attempts=3, priority=INTERACTIVE, cancel_event=None):
+        """Generates the next interview question based on previous performance.
+
+        Unseen banked questions are served first. Generated candidates too similar
+        to a question in question_index are regenerated up to max_attempts times,
+        each retry naming the rejected candidates, after which the least similar
+        one is kept and a warning is logged.
+        """
+        # Banked questions do not account for previous performance
+        if self.bank is not None and not previous_performance:
+            question = self.bank.draw_question(subject, topic, current_difficulty, question_index)
+            if question:
+                self.metrics.record(self.interview_agent.name, 0.0, cache_hit=True)
+                if question_index is not None and record:
+                    question_index.add(question)
+                return question
+        
+        # If topic is empty, generate questions about the general subject
+        content = f"Generate a single {current_difficulty} realistic interview question for {topic} in {subject}. Make sure this question is DIFFERENT from any previous questions." if topic else f"Generate a single {current_difficulty} realistic interview question about {subject}. Ensure this is a UNIQUE question that hasn't been asked before."
+        
+        if previous_performance:
+            content += f"\n\nPrevious performance: {previous_performance}"
+        
+        question = self._reply(self.interview_agent, content, "Question generation failed!", priority=priority, cancel_event=cancel_event)
+        
+        # Rejecting near-duplicates locally instead of listing old questions in the prompt
+        if question_index is not None:
+            best_similarity = question_index.most_similar(question)[0]
+            rejected = [question]
+            for _ in range(max_attempts - 1):
+                if best_similarity < question_index.threshold:
+                    break
+                # Naming the rejected candidates so the retry steers away from them
+                retry_content = content + "\n\nDo NOT ask anything similar to these already asked questions:\n" + "\n".join(f"- {text}" for text in rejected)
+                candidate = self._reply(self.interview_agent, retry_content, "Question generation failed!", priority=priority, cancel_event=cancel_event)
+                rejected.append(candidate)
+                similarity = question_index.most_similar(candidate)[0]
+                if similarity < best_similarity:
+                    question, best_similarity = candidate, similarity
+            
+            if best_similarity >= question_index.threshold:
+                logger.warning("Kept a near-duplicate %s question after %d attempts (similarity %.2f): %s",
+                               topic or subject, max_attempts, best_similarity, question)
+            
+            # Store this question for future reference
+            if record:
+                question_index.add(question)
+        
+        return question
+
+    def evaluate_answer(self, question, user_answer, stream=False):
+        """Evaluates user's answer and provides feedback with a rating."""
+        content = f"Question: {question}\n\nUser's Answer: {user_answer}\n\nEvaluate this answer:"
+        
+        if stream:
+            return self._stream(self.feedback_agent, content)
+        return self._reply(self.feedback_agent, content, "Evaluation failed!")
+
+    def evaluate_answers(self, answered_questions, priority=INTERACTIVE):
+        """Evaluates several (question, answer) pairs in one call, one 'Answer N:' block each."""
+        numbered = "\n\n".join(
+            f"Question {i}: {question}\nUser's Answer {i}: {answer.strip() or '(no answer)'}"
+            for i, (question, answer) in enumerate(answered_questions, 1))
+        content = f"Evaluate these {len(answered_questions)} interview answers:\n\n{numbered}"
+        return self._reply(self.batch_feedback_agent, content, "Evaluation failed!", priority=priority)
+
+    def get_overall_performance(self, mcq_results, interview_results, stream=False):
+        """Provides an overall assessment of the user's performance."""
+        combined_results = f"MCQ Results:\n{mcq_results}\n\nInterview Results:\n{interview_results}"
+        content = f"Analyze the user's overall performance based on these results:\n\n{combined_results}"
+        
+        if stream:
+            return self._stream(self.performance_agent, content)
+        return self._reply(self.performance_agent, content, "Performance analysis failed!")
+
+
+def create_agents(api_key, bank=True, backend=None, processes=1):
+    """Builds TutorAgents with the content cache and question bank configured from the environment.
+
+    Pass bank=False to never serve from a question bank, e.g. while building one.
+    LLM_BACKEND=fake swaps Groq for the local FakeBackend unless a backend is given.
+    With processes > 1 the Groq limits are split evenly between that many
+    worker processes and METRICS_PORT is ignored, since it cannot be shared.
+    """
+    if backend is None and os.getenv("LLM_BACKEND", "groq") == "fake":
+        backend = FakeBackend(latency=float(os.getenv("FAKE_LLM_LATENCY", 0.5)))
+
+    cache = None
+    cache_path = os.getenv("CONTENT_CACHE_PATH", ".coach_cache.sqlite3")
+    if cache_path:
+        cache = ContentCache(
+            cache_path,
+            ttl=int(os.getenv("CONTENT_CACHE_TTL", 7 * 24 * 3600)),
+            max_bytes=int(os.getenv("CONTENT_CACHE_MAX_MB", 256)) * 1024 * 1024
+        )
+
+    question_bank = None
+    bank_path = os.getenv("QUESTION_BANK_PATH", DEFAULT_BANK_PATH)
+    if bank and bank_path and os.path.exists(bank_path):
+        question_bank = QuestionBank(bank_path)
+
+    # One scheduler per process so every session shares the provider's limits
+    scheduler = RequestScheduler(
+        requests_per_minute=max(1, int(os.getenv("GROQ_REQUESTS_PER_MINUTE", 30)) // processes),
+        tokens_per_minute=max(1, int(os.getenv("GROQ_TOKENS_PER_MINUTE", 12000)) // processes),
+        max_concurrency=max(1, int(os.getenv("GROQ_MAX_CONCURRENCY", 8)) // processes)
+    )
+
+    metrics = MetricsRecorder(log_path=os.getenv("METRICS_LOG") or None)
+    if os.getenv("METRICS_PORT") and processes == 1:
+        metrics.start_http_server(int(os.getenv("METRICS_PORT")))
+
+    return TutorAgents(api_key, cache=cache, bank=question_bank, scheduler=scheduler, metrics=metrics, backend=backend)
@@ -0,0 +1,223 @@
+"""LLM backends TutorAgents can run on.
+
+A backend creates agent objects exposing ``name`` and ``system_message`` and
+answers prompts for them, either blocking (``complete``) or as a stream of
+text chunks (``stream``).
+"""
+
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+
+class GroqBackend:
+    """Groq through AutoGen agents for blocking replies and the Groq SDK for streams.
+
+    Nothing is imported or connected until first use: the Groq client is
+    created on the first stream and each AutoGen agent on its first blocking
+    reply, so startup never waits for autogen or groq to load.
+    """
+
+    def __init__(self, api_key, model=DEFAULT_MODEL):
+        self.api_key = api_key
+        self.model = model
+        self.llm_config = {'config_list': [
+            {'model': self.model, 'api_key': api_key, 'api_type': "groq"}]}
+        self._groq_client = None
+        self._assistants = {}
+        # Separate locks, so a stream never waits on autogen loading or an agent being built
+        self._client_lock = threading.Lock()
+        self._assistants_lock = threading.Lock()
+
+    @property
+    def groq_client(self):
+        """Raw Groq client used for token streaming, AutoGen replies are blocking."""
+        with self._client_lock:
+            if self._groq_client is None:
+                from groq import Groq
+                self._groq_client = Groq(api_key=self.api_key)
+            return self._groq_client
+
+    def create_agent(self, name, system_message):
+        """Returns the agent's name and system message, its AutoGen agent is built on first reply."""
+        return SimpleNamespace(name=name, system_message=system_message)
+
+    def _assistant(self, agent):
+        """Returns the AutoGen AssistantAgent for an agent on the shared Groq config, building it once."""
+        # Imported before taking the lock; Python's import lock serializes the first load
+        from autogen import AssistantAgent
+
+        with self._assistants_lock:
+            assistant = self._assistants.get(agent.name)
+            if assistant is None:
+                assistant = self._assistants[agent.name] = AssistantAgent(
+                    name=agent.name,
+                    system_message=agent.system_message,
+                    llm_config=self.llm_config,
+                    human_input_mode="NEVER",
+                    code_execution_config=False
+                )
+            return assistant
+
+    def warm_up(self):
+        """Loads the Groq and AutoGen clients ahead of the first call."""
+        self.groq_client
+        import autogen  # noqa: F401
+
+    def complete(self, agent, content):
+        """Returns the agent's full reply, or None if it produced no content."""
+        response = self._assistant(agent).generate_reply(
+            messages=[{"role": "user", "content": content}]
+        )
+        if isinstance(response, dict):
+            return response.get("content")
+        return None if response is None else str(response)
+
+    def stream(self, agent, content, usage=None):
+        """Yields the reply chunk by chunk, filling usage from Groq's final chunk."""
+        stream = self.groq_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": agent.system_message},
+                {"role": "user", "content": content}],
+            stream=True
+        )
+        for chunk in stream:
+            chunk_usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if chunk_usage is not None and usage is not None:
+                usage["prompt_tokens"] = chunk_usage.prompt_tokens
+                usage["completion_tokens"] = chunk_usage.completion_tokens
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+_CONCEPTS = [
+    "state management", "error handling", "caching", "concurrency", "testing strategy",
+    "performance tuning", "API design", "data modelling", "security", "observability",
+    "scalability", "memory usage", "dependency management", "code review", "deployment",
+]
+_OPENERS = [
+    "How would you approach", "Walk me through your experience with", "What trade-offs do you consider in",
+    "Describe a time you improved", "How do you explain", "What are common pitfalls in",
+    "How would you debug problems with", "What metrics would you watch for",
+]
+_FEEDBACK = [
+    "The answer is clear and well structured.",
+    "Good grasp of the fundamentals, but the trade-offs need more depth.",
+    "The explanation lacks a concrete example.",
+    "Strong communication, with accurate technical detail.",
+    "The answer drifts from the question; focus on the core concept first.",
+]
+
+
+class FakeBackend:
+    """Deterministic local stand-in for the LLM, for benchmarks and offline runs.
+
+    Each reply waits ``latency`` seconds before its first token and then emits
+    ``tokens_per_second`` tokens of roughly four characters each. Replies are
+    canned in the formats the app parses: lessons with the four expected
+    sections, MCQs in the mcq_agent format and 'Rating: X/5' feedback. They are
+    seeded from the agent, the prompt and how often that prompt has been seen,
+    so a run is reproducible regardless of thread scheduling. ``outputs`` maps
+    agent names to fixed replies that override the canned ones.
+    """
+
+    def __init__(self, latency=0.5, tokens_per_second=250, seed=0, outputs=None, model="fake-llm"):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self.outputs = outputs or {}
+        self.model = model
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def create_agent(self, name, system_message):
+        """Returns a plain object carrying the agent's name and system message."""
+        return SimpleNamespace(name=name, system_message=system_message)
+
+    def warm_up(self):
+        """Does nothing, the fake backend has nothing to load."""
+
+    def complete(self, agent, content):
+        """Returns the whole canned reply after the simulated generation time."""
+        return "".join(self.stream(agent, content))
+
+    def stream(self, agent, content, usage=None):
+        """Yields the canned reply at the configured latency and token rate."""
+        reply = self.reply_for(agent.name, content)
+        tokens = [reply[i:i + 4] for i in range(0, len(reply), 4)]
+        if usage is not None:
+            usage["prompt_tokens"] = (len(agent.system_message) + len(content)) // 4
+            usage["completion_tokens"] = len(tokens)
+
+        time.sleep(self.latency)
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        # Sleeping per batch of tokens keeps timer overhead out of the measurement
+        batch = max(1, int(self.tokens_per_second * 0.02)) if interval else len(tokens)
+        for start in range(0, len(tokens), batch):
+            chunk = tokens[start:start + batch]
+            if interval:
+                time.sleep(interval * len(chunk))
+            yield "".join(chunk)
+
+    def reply_for(self, agent_name, content):
+        """Returns the canned reply for an agent and prompt."""
+        if agent_name in self.outputs:
+            return self.outputs[agent_name]
+        with self._lock:
+            key = (agent_name, content)
+            count = self._seen[key] = self._seen.get(key, 0) + 1
+        rng = random.Random(f"{self.seed}:{agent_name}:{content}:{count}")
+        builder = getattr(self, f"_{agent_name}", self._default)
+        return builder(rng, content)
+
+    def _lesson_agent(self, rng, content):
+        topic = content.removeprefix("Create a detailed lesson plan on ").rstrip(".")
+        concepts = rng.sample(_CONCEPTS, 4)
+        key_concepts = "".join(f"- **{c.title()}**: how {c} applies to {topic}, when it matters and what to watch for.\n" for c in concepts)
+        examples = "".join(f"Example {i + 1}: applying {c} in practice, step by step, with the mistakes people usually make.\n" for i, c in enumerate(concepts))
+        return (
+            f"# {topic}\n\n## Introduction\n{topic} is introduced here with its motivation and history. "
+            f"It explains why {topic} matters in real projects, which problems it solves and where it fits "
+            f"alongside the tools you already know.\n\n"
+            f"## Key Concepts\n{key_concepts}\n## Examples\n{examples}\n"
+            f"## Summary\nWe covered {', '.join(concepts)}. Revisit each concept with a small exercise of your own "
+            f"and compare the trade-offs before moving on to the interview questions.\n"
+        )
+
+    def _mcq_agent(self, rng, content):
+        match = re.search(r"Generate (\d+)", content)
+        count = int(match.group(1)) if match else 5
+        blocks = []
+        for i in range(count):
+            concepts = rng.sample(_CONCEPTS, 4)
+            options = "\n".join(f"{letter}) {concept.title()}" for letter, concept in zip("ABCD", concepts))
+            blocks.append(f"Q{i + 1}. Which concept best matches statement {rng.randint(1, 999)}?\n{options}\n\nCorrect Answer: {rng.choice('ABCD')}")
+        return "\n\n".join(blocks)
+
+    def _interview_agent(self, rng, content):
+        match = re.search(r"question (?:for|about) (.+?)(?: in | ?\.)", content)
+        topic = match.group(1) if match else "this subject"
+        return f"{rng.choice(_OPENERS)} {rng.choice(_CONCEPTS)} when working on {topic}, especially around {rng.choice(_CONCEPTS)}?"
+
+    def _feedback_agent(self, rng, content):
+        return f"Rating: {rng.randint(1, 5)}/5\n\nFeedback: {' '.join(rng.sample(_FEEDBACK, 3))}"
+
+    def _batch_feedback_agent(self, rng, content):
+        count = len(re.findall(r"^Question \d+:", content, re.MULTILINE))
+        return "\n\n".join(f"Answer {i}:\n{self._feedback_agent(rng, content)}" for i in range(1, count + 1))
+
+    def _mcq_feedback_agent(self, rng, content):
+        missed = re.findall(r"^Q\d+\.", content, re.MULTILINE)
+        return "\n\n".join(f"{q} The correct option follows directly from the lesson; review the related key concept." for q in missed) or "No missed questions."
+
+    def _performance_agent(self, rng, content):
+        return "## Strengths\n" + " ".join(rng.sample(_FEEDBACK, 2)) + "\n\n## Areas for Improvement\n" + " ".join(rng.sample(_FEEDBACK, 2)) + f"\n\n## Recommendations\nReview {', '.join(rng.sample(_CONCEPTS, 3))}."
+
+    def _default(self, rng, content):
+        return " ".join(rng.sample(_FEEDBACK, 3))
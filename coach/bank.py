@@ -0,0 +1,227 @@
+"""Pre-generated question banks and the offline batch builder.
+
+Build a bank ahead of time, then point the app at it with QUESTION_BANK_PATH:
+
+    python -m coach.bank build --target "Python:Decorators" --target "System Design" \
+        --questions 10 --mcqs 10 --workers 4
+    python -m coach.bank stats
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from coach.db import SQLiteStore, pack, unpack
+from coach.dedup import QuestionIndex
+from coach.pipeline import DIFFICULTIES, generate_mcqs_map_reduce
+from coach.scheduler import BATCH
+
+DEFAULT_BANK_PATH = "question_bank.sqlite3"
+
+
+def _normalize(subject, topic):
+    """Normalizes a subject/topic pair, an empty topic meaning the whole subject."""
+    subject = " ".join(subject.split()).casefold()
+    topic = " ".join((topic or "").split()).casefold() or subject
+    return subject, topic
+
+
+def lesson_hash(lesson_content):
+    """Identifies a lesson by its content so MCQs can be matched to it."""
+    return hashlib.sha256(lesson_content.strip().encode("utf-8")).hexdigest()
+
+
+class QuestionBank(SQLiteStore):
+    """SQLite store of interview questions, lessons and MCQ sets.
+
+    Lessons and MCQ sets are stored as zlib-compressed JSON.
+    """
+
+    def __init__(self, path=DEFAULT_BANK_PATH):
+        super().__init__(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "id INTEGER PRIMARY KEY, subject TEXT, topic TEXT, difficulty TEXT, "
+            "question TEXT, created REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS questions_key ON questions (subject, topic, difficulty)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lessons ("
+            "subject TEXT, topic TEXT, lesson_hash TEXT, lesson BLOB, mcqs BLOB, created REAL, "
+            "PRIMARY KEY (subject, topic))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lessons_hash ON lessons (lesson_hash)")
+
+    def add_questions(self, subject, topic, difficulty, questions):
+        """Stores interview questions for a subject/topic/difficulty."""
+        subject, topic = _normalize(subject, topic)
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO questions (subject, topic, difficulty, question, created) VALUES (?, ?, ?, ?, ?)",
+                [(subject, topic, difficulty, question, now) for question in questions],
+            )
+
+    def add_lesson(self, subject, topic, lesson_content, mcqs):
+        """Stores a lesson and the parsed MCQ set generated from it, replacing any previous one."""
+        subject, topic = _normalize(subject, topic)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lessons (subject, topic, lesson_hash, lesson, mcqs, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (subject, topic, lesson_hash(lesson_content), pack(lesson_content), pack(mcqs), time.time()),
+            )
+
+    def get_lesson(self, subject, topic):
+        """Returns the banked lesson for a subject/topic, or None."""
+        subject, topic = _normalize(subject, topic)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lesson FROM lessons WHERE subject = ? AND topic = ?", (subject, topic)).fetchone()
+        return unpack(row[0]) if row else None
+
+    def get_mcqs(self, lesson_content, num_questions):
+        """Returns num_questions banked MCQs generated from this exact lesson, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mcqs FROM lessons WHERE lesson_hash = ?", (lesson_hash(lesson_content),)).fetchone()
+        if not row:
+            return None
+        mcqs = unpack(row[0])
+        return mcqs[:num_questions] if len(mcqs) >= num_questions else None
+
+    def draw_question(self, subject, topic, difficulty, question_index=None):
+        """Returns a random banked question not already in question_index, or None."""
+        subject, topic = _normalize(subject, topic)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question FROM questions WHERE subject = ? AND topic = ? AND difficulty = ?",
+                (subject, topic, difficulty)).fetchall()
+        random.shuffle(rows)
+        for (question,) in rows:
+            if question_index is None or not question_index.is_duplicate(question):
+                return question
+        return None
+
+    def stats(self):
+        """Returns question counts per subject/topic/difficulty and the number of banked lessons."""
+        with self._lock:
+            counts = self._conn.execute(
+                "SELECT subject, topic, difficulty, COUNT(*) FROM questions "
+                "GROUP BY subject, topic, difficulty ORDER BY subject, topic, difficulty").fetchall()
+            lessons = self._conn.execute("SELECT COUNT(*) FROM lessons").fetchone()[0]
+        return {"questions": counts, "lessons": lessons}
+
+
+def _build_lesson(agents, bank, subject, topic, num_mcqs):
+    lesson = agents.generate_lesson(subject, topic or subject, priority=BATCH)
+    # Sections run one after another in this worker so --workers bounds the LLM calls
+    mcqs = generate_mcqs_map_reduce(agents, lesson, num_mcqs, priority=BATCH, parallel=False)
+    bank.add_lesson(subject, topic, lesson, mcqs)
+    return f"lesson + {len(mcqs)} MCQs"
+
+
+def _build_question(agents, bank, subject, topic, difficulty, question_index):
+    question = agents.generate_next_interview_question(subject, topic or subject, difficulty, question_index=question_index, priority=BATCH)
+    bank.add_questions(subject, topic, difficulty, [question])
+    return f"{difficulty} question"
+
+
+def build_bank(agents, bank, targets, difficulties=DIFFICULTIES, questions_per_difficulty=10, num_mcqs=10, workers=4, log=None):
+    """Generates question banks and MCQ sets for (subject, topic) targets with bounded parallelism.
+
+    Each question is its own task so the pool stays busy, and questions for the
+    same subject/topic/difficulty are de-duplicated against each other. Every
+    task makes one LLM call at a time, so at most ``workers`` calls are in
+    flight. Returns the number of failed tasks.
+    """
+    tasks = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bank") as executor:
+        for subject, topic in targets:
+            if num_mcqs:
+                tasks.append(((subject, topic), executor.submit(_build_lesson, agents, bank, subject, topic, num_mcqs)))
+            for difficulty in difficulties:
+                question_index = QuestionIndex()
+                for _ in range(questions_per_difficulty):
+                    tasks.append(((subject, topic), executor.submit(
+                        _build_question, agents, bank, subject, topic, difficulty, question_index)))
+
+        futures = {future: target for target, future in tasks}
+        failures = 0
+        for done, future in enumerate(as_completed(futures), 1):
+            subject, topic = futures[future]
+            label = f"{subject}/{topic}" if topic else subject
+            try:
+                result = future.result()
+            except Exception as exc:
+                failures += 1
+                result = f"failed: {exc}"
+            if log:
+                log(f"[{done}/{len(futures)}] {label}: {result}")
+    return failures
+
+
+def parse_target(value):
+    """Parses a 'Subject' or 'Subject:Topic' target."""
+    subject, _, topic = value.partition(":")
+    if not subject.strip():
+        raise argparse.ArgumentTypeError(f"invalid target {value!r}, expected 'Subject' or 'Subject:Topic'")
+    return subject.strip(), topic.strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m coach.bank", description="Build and inspect offline question banks.")
+    parser.add_argument("--bank", default=os.getenv("QUESTION_BANK_PATH") or DEFAULT_BANK_PATH, help="bank file to write or read")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="generate questions and MCQ sets")
+    build.add_argument("--target", action="append", type=parse_target, default=[], help="'Subject' or 'Subject:Topic', repeatable")
+    build.add_argument("--targets-file", help="file with one 'Subject' or 'Subject:Topic' per line")
+    build.add_argument("--difficulty", nargs="+", choices=DIFFICULTIES, default=DIFFICULTIES)
+    build.add_argument("--questions", type=int, default=10, help="interview questions per target and difficulty")
+    build.add_argument("--mcqs", type=int, default=10, help="MCQs per target lesson, 0 to skip lessons")
+    build.add_argument("--workers", type=int, default=4, help="maximum concurrent LLM calls")
+
+    commands.add_parser("stats", help="show what the bank holds")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        if not os.path.exists(args.bank):
+            parser.error(f"no question bank at {args.bank}")
+        stats = QuestionBank(args.bank).stats()
+        print(f"{stats['lessons']} lessons")
+        for subject, topic, difficulty, count in stats["questions"]:
+            print(f"{subject}/{topic} {difficulty}: {count} questions")
+        return 0
+
+    targets = list(args.target)
+    if args.targets_file:
+        with open(args.targets_file, encoding="utf-8") as targets_file:
+            targets += [parse_target(line) for line in targets_file if line.strip() and not line.startswith("#")]
+    if not targets:
+        parser.error("build needs at least one --target or --targets-file")
+
+    from dotenv import load_dotenv
+    from coach.agents import create_agents
+
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        parser.error("GROQ_API_KEY is missing. Please set it in your environment variables.")
+
+    # The bank being built must not serve itself
+    bank = QuestionBank(args.bank)
+    agents = create_agents(api_key, bank=False)
+    failures = build_bank(
+        agents, bank, targets, args.difficulty, args.questions, args.mcqs, args.workers,
+        log=lambda line: print(line, file=sys.stderr))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
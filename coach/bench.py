@@ -0,0 +1,344 @@
+"""Offline benchmark of full user flows on the deterministic fake LLM, and of cold starts.
+
+Each simulated session runs lesson -> MCQs -> submit -> N interview rounds ->
+report through the same TutorAgents, parser, scorer and prefetch pipeline the
+app uses, with many sessions in flight at once:
+
+    python -m coach.bench --sessions 50 --concurrency 16 --rounds 5
+    python -m coach.bench --latency 0 --tokens-per-second 0 --json
+    python -m coach.bench --round-size 5
+    python -m coach.bench --startup --repeat 10
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from contextlib import contextmanager
+
+from coach.agents import TutorAgents
+from coach.backends import FakeBackend
+from coach.dedup import QuestionIndex
+from coach.parsing import format_mcqs, parse_mcqs, parse_rating, split_lesson_sections
+from coach.pipeline import (DIFFICULTIES, QuestionPrefetcher, SectionedMCQGenerator, evaluate_round, generate_round_questions,
+                            next_difficulty, round_difficulty)
+from coach.scheduler import RequestScheduler
+from coach.scoring import format_misses_for_review, missed_questions, score_mcqs
+from coach.summary import PerformanceSummary
+
+SUBJECTS = [("Python", "Decorators"), ("System Design", ""), ("Databases", "Indexing"), ("Machine Learning", "Regularization")]
+
+
+def percentile(samples, fraction):
+    """Returns the nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class Timings:
+    """Thread-safe collection of durations per step."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, step, seconds):
+        with self._lock:
+            self.samples.setdefault(step, []).append(seconds)
+
+    @contextmanager
+    def time(self, step):
+        start = time.perf_counter()
+        yield
+        self.add(step, time.perf_counter() - start)
+
+
+def run_session(agents, timings, session_id, num_mcqs, rounds, round_size=0):
+    """Drives one user through the whole app flow, in timed rounds of round_size questions if set."""
+    rng = random.Random(session_id)
+    subject, topic = SUBJECTS[session_id % len(SUBJECTS)]
+    lesson_topic = topic or subject
+    question_index = QuestionIndex()
+    session_start = time.perf_counter()
+
+    # Lesson, streamed
+    start = time.perf_counter()
+    chunks = []
+    for chunk in agents.generate_lesson(subject, lesson_topic, stream=True):
+        if not chunks:
+            timings.add("lesson_ttft", time.perf_counter() - start)
+        chunks.append(chunk)
+    lesson = "".join(chunks)
+    timings.add("lesson", time.perf_counter() - start)
+
+    # MCQs, one streamed call per lesson section
+    start = time.perf_counter()
+    generator = SectionedMCQGenerator(agents, lesson, num_mcqs)
+    for i, _ in enumerate(generator.iter_questions()):
+        if not i:
+            timings.add("mcq_first_question", time.perf_counter() - start)
+    questions = generator.result()
+    timings.add("mcqs", time.perf_counter() - start)
+
+    # Submit: local grading, explanations only for misses
+    with timings.time("mcq_submit"):
+        answers = {i: rng.choice("ABCD") for i in range(len(questions))}
+        score = score_mcqs(questions, answers, lesson_topic)
+        misses = missed_questions(questions, score)
+        if misses:
+            "".join(agents.evaluate_mcq_answers(format_misses_for_review(misses), stream=True))
+
+    summary = PerformanceSummary()
+    summary.add_mcq_score(score)
+    difficulty = rng.choice(DIFFICULTIES)
+
+    # Timed rounds, each answer set scored in batched calls
+    for _ in range(rounds if round_size else 0):
+        with timings.time("timed_round_questions"):
+            questions = generate_round_questions(agents, subject, lesson_topic, difficulty, round_size, question_index)
+        with timings.time("timed_round_evaluation"):
+            results = evaluate_round(agents, questions, [f"Answer {rng.random()}" for _ in questions])
+        for result in results:
+            summary.add_interview(result["rating"], difficulty, result["feedback"], lesson_topic)
+        difficulty = round_difficulty(difficulty, [result["rating"] for result in results])
+
+    # Interview rounds with prefetched next questions
+    if not round_size:
+        with timings.time("interview_start"):
+            question = agents.generate_next_interview_question(subject, lesson_topic, difficulty, question_index=question_index)
+    for _ in range(0 if round_size else rounds):
+        with timings.time("interview_round"):
+            prefetcher = QuestionPrefetcher(agents, subject, topic, difficulty, question_index)
+            try:
+                feedback = "".join(agents.evaluate_answer(question, f"Answer {rng.random()}", stream=True))
+                rating = parse_rating(feedback)
+                summary.add_interview(rating, difficulty, feedback, lesson_topic)
+                difficulty = next_difficulty(difficulty, rating)
+                question = prefetcher.take(difficulty)
+            finally:
+                prefetcher.cancel()
+
+    # Report
+    with timings.time("report"):
+        "".join(agents.get_overall_performance(summary.mcq_results(), summary.interview_results(), stream=True))
+
+    timings.add("session", time.perf_counter() - session_start)
+
+
+def run_flows(agents, sessions, concurrency, num_mcqs, rounds, round_size=0):
+    """Runs simulated sessions concurrently and returns (timings, wall time, failures)."""
+    timings = Timings()
+    failures = []
+    next_session = iter(range(sessions))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                session_id = next(next_session, None)
+            if session_id is None:
+                return
+            try:
+                run_session(agents, timings, session_id, num_mcqs, rounds, round_size)
+            except Exception as exc:
+                failures.append(f"session {session_id}: {type(exc).__name__}: {exc}")
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"session-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, time.perf_counter() - start, failures
+
+
+def run_cpu_benchmarks(num_mcqs, repeat=200):
+    """Times the in-process hot paths that run on every submit or rerun, in microseconds."""
+    backend = FakeBackend(latency=0, tokens_per_second=0)
+    lesson = backend.reply_for("lesson_agent", "Create a detailed lesson plan on Decorators for Python.")
+    mcq_text = backend.reply_for("mcq_agent", f"Generate {num_mcqs} MCQs")
+    questions = parse_mcqs(mcq_text)
+    answers = {i: "A" for i in range(len(questions))}
+    index = QuestionIndex()
+    for i in range(200):
+        index.add(backend.reply_for("interview_agent", "Generate a single Medium realistic interview question about Python."))
+    probe = backend.reply_for("interview_agent", "Generate a single Hard realistic interview question about Python.")
+
+    def per_call(fn):
+        return timeit.timeit(fn, number=repeat) / repeat * 1e6
+
+    return {
+        "parse_mcqs": per_call(lambda: parse_mcqs(mcq_text)),
+        "split_lesson_sections": per_call(lambda: split_lesson_sections(lesson)),
+        "format_mcqs": per_call(lambda: format_mcqs(questions)),
+        "score_mcqs": per_call(lambda: score_mcqs(questions, answers)),
+        "dedup_lookup_200": per_call(lambda: index.most_similar(probe)),
+    }
+
+
+# Run in a fresh interpreter: the app's imports, then its shared agents
+_AGENTS_PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import coach.agents, coach.pipeline, coach.scoring, coach.store, coach.summary
+imported = time.perf_counter()
+coach.agents.create_agents(os.environ["GROQ_API_KEY"])
+print(json.dumps({
+    "import_coach": imported - start,
+    "create_agents": time.perf_counter() - imported,
+    "heavy_modules": sorted(name for name in ("autogen", "groq", "openai") if name in sys.modules),
+}))
+"""
+
+# Run in a fresh interpreter: the first script run of a new session, up to its last element
+_APP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+print(json.dumps({
+    "import_streamlit": imported - start,
+    "first_run": time.perf_counter() - imported,
+    "errors": [element.value for element in app.exception],
+}))
+"""
+
+
+def _run_probe(probe, env, *args):
+    """Runs a probe in a new interpreter, returning its wall time and its JSON report."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", probe, *args], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_startup_benchmarks(app_path, repeat=5):
+    """Times cold starts in fresh interpreters, in seconds.
+
+    time_to_first_paint is the wall time of a new process importing Streamlit
+    and completing the app's first script run, which is when a new replica's
+    first user sees the whole page. It is None when Streamlit is not
+    installed. Caches and stores go to a temporary directory.
+    """
+    samples = {}
+    heavy_modules = set()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.setdefault("GROQ_API_KEY", "startup-benchmark")
+        env.setdefault("CONTENT_CACHE_PATH", os.path.join(workdir, "cache.sqlite3"))
+        env.setdefault("SESSION_STORE_PATH", os.path.join(workdir, "sessions.sqlite3"))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(app_path)), env.get("PYTHONPATH")]))
+        has_streamlit = importlib.util.find_spec("streamlit") is not None
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+            samples.setdefault("interpreter", []).append(time.perf_counter() - start)
+
+            wall_time, report = _run_probe(_AGENTS_PROBE, env)
+            samples.setdefault("agents_ready", []).append(wall_time)
+            samples.setdefault("import_coach", []).append(report["import_coach"])
+            samples.setdefault("create_agents", []).append(report["create_agents"])
+            heavy_modules.update(report["heavy_modules"])
+
+            if has_streamlit:
+                wall_time, report = _run_probe(_APP_PROBE, env, app_path)
+                if report["errors"]:
+                    raise RuntimeError(f"app raised on its first run: {report['errors'][0]}")
+                samples.setdefault("time_to_first_paint", []).append(wall_time)
+                samples.setdefault("import_streamlit", []).append(report["import_streamlit"])
+                samples.setdefault("first_script_run", []).append(report["first_run"])
+
+    results = {step: {"p50": percentile(values, 0.50), "max": max(values)} for step, values in samples.items()}
+    results.setdefault("time_to_first_paint", None)
+    results["heavy_modules_at_startup"] = sorted(heavy_modules)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m coach.bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=50, help="simulated users")
+    parser.add_argument("--concurrency", type=int, default=16, help="sessions in flight at once")
+    parser.add_argument("--rounds", type=int, default=5, help="interview rounds per session")
+    parser.add_argument("--round-size", type=int, default=0, help="questions per timed round, 0 for one at a time")
+    parser.add_argument("--mcqs", type=int, default=10, help="MCQs per session")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake time to first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="fake generation speed, 0 for instant")
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="scheduler limit, 0 for no scheduler")
+    parser.add_argument("--tokens-per-minute", type=int, default=10 ** 9)
+    parser.add_argument("--max-concurrency", type=int, default=64, help="scheduler concurrency cap")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--startup", action="store_true", help="time cold starts instead of user flows")
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts to time with --startup")
+    parser.add_argument("--app", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py"),
+                        help="Streamlit script timed by --startup")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        results = run_startup_benchmarks(args.app, args.repeat)
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return 0
+        print(f"{args.repeat} cold starts")
+        print(f"{'step':<24}{'p50 s':>10}{'max s':>10}")
+        for step, row in results.items():
+            if step == "time_to_first_paint" and row is None:
+                print(f"{step:<24}{'skipped, streamlit is not installed':>36}")
+            elif step != "heavy_modules_at_startup":
+                print(f"{step:<24}{row['p50']:>10.3f}{row['max']:>10.3f}")
+        print("heavy modules loaded at startup: " + (", ".join(results["heavy_modules_at_startup"]) or "none"))
+        return 0
+
+    scheduler = None
+    if args.requests_per_minute:
+        scheduler = RequestScheduler(args.requests_per_minute, args.tokens_per_minute, args.max_concurrency)
+    backend = FakeBackend(latency=args.latency, tokens_per_second=args.tokens_per_second, seed=args.seed)
+    agents = TutorAgents(backend=backend, scheduler=scheduler)
+
+    timings, wall_time, failures = run_flows(agents, args.sessions, args.concurrency, args.mcqs, args.rounds, args.round_size)
+    llm_calls = sum(row["calls"] for row in agents.metrics.snapshot())
+    results = {
+        "config": vars(args),
+        "wall_time": wall_time,
+        "sessions_per_second": (args.sessions - len(failures)) / wall_time,
+        "llm_calls_per_second": llm_calls / wall_time,
+        "failures": failures,
+        "steps": {
+            step: {
+                "count": len(samples),
+                "p50": percentile(samples, 0.50),
+                "p95": percentile(samples, 0.95),
+                "p99": percentile(samples, 0.99),
+            }
+            for step, samples in timings.samples.items()
+        },
+        "cpu_us": run_cpu_benchmarks(args.mcqs),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.sessions} sessions, {args.concurrency} concurrent, {args.rounds} rounds, "
+              f"{wall_time:.2f}s wall, {results['sessions_per_second']:.2f} sessions/s, "
+              f"{results['llm_calls_per_second']:.1f} LLM calls/s")
+        print(f"{'step':<24}{'count':>7}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}")
+        for step, row in results["steps"].items():
+            print(f"{step:<24}{row['count']:>7}{row['p50']:>10.3f}{row['p95']:>10.3f}{row['p99']:>10.3f}")
+        print("in-process hot paths (us/call): " + ", ".join(f"{k} {v:.1f}" for k, v in results["cpu_us"].items()))
+        for failure in failures:
+            print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Disk-backed cache of agent completions."""
+
+import hashlib
+import time
+
+from coach.db import SQLiteStore
+
+
+class ContentCache(SQLiteStore):
+    """SQLite cache of completions keyed on agent name, normalized prompt and model.
+
+    Entries expire after ``ttl`` seconds. When the cache holds more than
+    ``max_entries`` entries or ``max_bytes`` of content, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000, max_bytes=256 * 1024 * 1024):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, agent TEXT, model TEXT, value TEXT, "
+            "size INTEGER, created REAL, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    @staticmethod
+    def make_key(agent_name, prompt, model, system_message=""):
+        """Hashes an agent name, whitespace/case-normalized prompt, model and system message into a key.
+
+        Editing an agent's system message therefore stops serving replies
+        cached under the old one.
+        """
+        normalized = " ".join(prompt.split()).casefold()
+        system_hash = hashlib.sha256(system_message.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{agent_name}\0{model}\0{system_hash}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached value for a key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, agent_name, model, value):
+        """Stores a value and evicts expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, agent, model, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, agent_name, model, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+        # Keeping the most recently used entries that fit both limits
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM (SELECT key, "
+            "ROW_NUMBER() OVER (ORDER BY accessed DESC) AS position, "
+            "SUM(size) OVER (ORDER BY accessed DESC ROWS UNBOUNDED PRECEDING) AS running_size "
+            "FROM entries) WHERE position > ? OR running_size > ?)",
+            (self.max_entries, self.max_bytes),
+        )
@@ -0,0 +1,47 @@
+"""SQLite plumbing shared by the content cache, question bank and session store."""
+
+import json
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+
+
+def pack(value):
+    """Serializes a JSON-compatible value to zlib-compressed bytes."""
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack(blob):
+    """Reverses pack."""
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SQLiteStore:
+    """Base for the SQLite-backed stores.
+
+    Opens the database in WAL mode so readers in other processes never block
+    the writer, and shares a single autocommit connection across threads
+    behind ``_lock``. ``synchronous`` optionally relaxes fsyncs, e.g. to
+    'NORMAL' for data that may lose its last commits on a power cut.
+    """
+
+    def __init__(self, path, synchronous=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if synchronous:
+            self._conn.execute(f"PRAGMA synchronous={synchronous}")
+
+    @contextmanager
+    def _transaction(self):
+        """Holds the lock for a transaction, rolled back if the block raises."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
@@ -0,0 +1,200 @@
+"""Per-agent latency, token and cost instrumentation."""
+
+import atexit
+import json
+import threading
+import time
+from collections import deque
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+# USD per token for llama-3.3-70b-versatile on Groq
+PROMPT_TOKEN_COST = 0.59 / 1_000_000
+COMPLETION_TOKEN_COST = 0.79 / 1_000_000
+
+
+def estimate_tokens(text):
+    """Approximates a token count at roughly four characters per token."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _AgentStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.wall_time_sum = 0.0
+        self.wall_time_count = 0
+        self.ttft_sum = 0.0
+        self.ttft_count = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.recent = deque(maxlen=1000)
+
+
+class MetricsRecorder:
+    """Thread-safe recorder of every agent call.
+
+    Keeps cumulative counters, a latency histogram and a window of recent wall
+    times per agent. Latency covers calls that reached the LLM only: cache
+    and bank hits and cancelled calls are counted but kept out of the wall
+    time and time to first token stats, and cancellations are not errors.
+    Each call can also be appended as one JSON line to log_path, through one
+    buffered handle written outside the stats lock; close() or interpreter
+    exit flushes it.
+    render_prometheus exposes the counters in the Prometheus text format.
+    """
+
+    def __init__(self, log_path=None, prompt_token_cost=PROMPT_TOKEN_COST, completion_token_cost=COMPLETION_TOKEN_COST):
+        self.log_path = log_path
+        self.prompt_token_cost = prompt_token_cost
+        self.completion_token_cost = completion_token_cost
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_lock = threading.Lock()
+        if log_path:
+            atexit.register(self.close)
+
+    def record(self, agent, wall_time, ttft=None, prompt_tokens=0, completion_tokens=0, cache_hit=False, error=None, cancelled=False):
+        """Records one call to an agent."""
+        cost = prompt_tokens * self.prompt_token_cost + completion_tokens * self.completion_token_cost
+        with self._lock:
+            stats = self._stats.setdefault(agent, _AgentStats())
+            stats.calls += 1
+            stats.errors += error is not None and not cancelled
+            stats.cancelled += cancelled
+            stats.cache_hits += cache_hit
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += cost
+            if not cache_hit and not cancelled:
+                stats.wall_time_sum += wall_time
+                stats.wall_time_count += 1
+                if ttft is not None:
+                    stats.ttft_sum += ttft
+                    stats.ttft_count += 1
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if wall_time <= bound:
+                        stats.buckets[i] += 1
+                stats.recent.append(wall_time)
+
+        if self.log_path:
+            entry = {
+                "ts": time.time(), "agent": agent, "wall_time": round(wall_time, 4),
+                "ttft": None if ttft is None else round(ttft, 4),
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "cost": round(cost, 8), "cache_hit": cache_hit, "error": error, "cancelled": cancelled,
+            }
+            self._write_log(json.dumps(entry) + "\n")
+
+    def _write_log(self, line):
+        with self._log_lock:
+            if self._log is None:
+                self._log = open(self.log_path, "a", encoding="utf-8")
+            self._log.write(line)
+
+    def close(self):
+        """Flushes and closes the JSONL log; a later call reopens it."""
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def snapshot(self):
+        """Returns one summary row per agent."""
+        with self._lock:
+            rows = []
+            for agent, stats in sorted(self._stats.items()):
+                recent = list(stats.recent)
+                rows.append({
+                    "agent": agent,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "cancelled": stats.cancelled,
+                    "cache_hits": stats.cache_hits,
+                    "avg_wall_time": stats.wall_time_sum / stats.wall_time_count if stats.wall_time_count else None,
+                    "p50_wall_time": _percentile(recent, 0.5),
+                    "p95_wall_time": _percentile(recent, 0.95),
+                    "avg_ttft": stats.ttft_sum / stats.ttft_count if stats.ttft_count else None,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost_usd": stats.cost,
+                })
+            return rows
+
+    def render_prometheus(self):
+        """Renders the counters in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP coach_{name} {help_text}")
+            lines.append(f"# TYPE coach_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"coach_{name}{{{labels}}} {value}")
+
+        with self._lock:
+            items = sorted(self._stats.items())
+            metric("agent_calls_total", "counter", "Agent calls.",
+                   [(f'agent="{a}"', s.calls) for a, s in items])
+            metric("agent_errors_total", "counter", "Agent calls that raised, other than cancellations.",
+                   [(f'agent="{a}"', s.errors) for a, s in items])
+            metric("agent_cancelled_total", "counter", "Agent calls cancelled before they completed.",
+                   [(f'agent="{a}"', s.cancelled) for a, s in items])
+            metric("agent_cache_hits_total", "counter", "Agent calls served from the content cache or question bank.",
+                   [(f'agent="{a}"', s.cache_hits) for a, s in items])
+            metric("agent_tokens_total", "counter", "Prompt and completion tokens.",
+                   [(f'agent="{a}",kind="prompt"', s.prompt_tokens) for a, s in items]
+                   + [(f'agent="{a}",kind="completion"', s.completion_tokens) for a, s in items])
+            metric("agent_cost_usd_total", "counter", "Estimated spend in USD.",
+                   [(f'agent="{a}"', f"{s.cost:.8f}") for a, s in items])
+            metric("agent_ttft_seconds_sum", "counter", "Summed time to first token of streamed calls.",
+                   [(f'agent="{a}"', f"{s.ttft_sum:.6f}") for a, s in items])
+            metric("agent_ttft_seconds_count", "counter", "Streamed calls with a first token.",
+                   [(f'agent="{a}"', s.ttft_count) for a, s in items])
+
+            lines.append("# HELP coach_agent_wall_time_seconds Wall time of agent calls that reached the LLM.")
+            lines.append("# TYPE coach_agent_wall_time_seconds histogram")
+            for agent, stats in items:
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    lines.append(f'coach_agent_wall_time_seconds_bucket{{agent="{agent}",le="{bound}"}} {count}')
+                lines.append(f'coach_agent_wall_time_seconds_bucket{{agent="{agent}",le="+Inf"}} {stats.wall_time_count}')
+                lines.append(f'coach_agent_wall_time_seconds_sum{{agent="{agent}"}} {stats.wall_time_sum:.6f}')
+                lines.append(f'coach_agent_wall_time_seconds_count{{agent="{agent}"}} {stats.wall_time_count}')
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="0.0.0.0"):
+        """Serves render_prometheus at /metrics from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
@@ -0,0 +1,218 @@
+"""Parsing of agent output into structured data."""
+
+import re
+
+# "Q1. ...", "Q 1: ...", "**Q1.** ..."
+_QUESTION_RE = re.compile(r"^Q\s*\d")
+# "A) ..." through "D) ..."
+_OPTION_RE = re.compile(r"^([A-D])\)")
+# "Correct Answer: B", "Correct Answer: (B)", "Correct Answer: B) ..."
+_CORRECT_RE = re.compile(r"^Correct Answer\s*:\s*\(?([A-D])\b", re.IGNORECASE)
+
+
+def _clean_line(line):
+    """Strips whitespace and markdown emphasis the model sometimes adds."""
+    line = line.strip()
+    if line.startswith("- "):
+        line = line[2:].lstrip()
+    return line.replace("**", "").strip()
+
+
+class MCQStreamParser:
+    """Incrementally parses MCQ text, emitting each question as soon as it is complete.
+
+    A question is complete once its ``Correct Answer:`` line arrives. Blocks that
+    never get one are emitted when the next question starts (or on ``close``) as
+    long as they have options, with ``correct`` left as ``None``. Blocks without
+    any options are dropped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pending = ""
+        self._current = None
+
+    def feed(self, chunk):
+        """Consumes a chunk of streamed text and returns the questions it completed."""
+        self.text += chunk
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+
+        completed = []
+        for line in lines:
+            question = self._consume(line)
+            if question:
+                completed.append(question)
+        return completed
+
+    def close(self):
+        """Flushes the trailing partial line and returns any remaining question."""
+        completed = []
+        question = self._consume(self._pending)
+        self._pending = ""
+        if question:
+            completed.append(question)
+
+        question = self._finish()
+        if question:
+            completed.append(question)
+        return completed
+
+    def iter_questions(self, chunks):
+        """Yields parsed questions from an iterable of text chunks as they complete."""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def _consume(self, line):
+        line = _clean_line(line)
+        if not line:
+            return None
+
+        # Looking for a new question
+        if _QUESTION_RE.match(line):
+            finished = self._finish()
+            self._current = {"text": line, "options": [], "correct": None}
+            return finished
+
+        if self._current is None:
+            return None
+
+        # Looking for options, ignoring repeated letters
+        option = _OPTION_RE.match(line)
+        if option:
+            letters = [existing[0] for existing in self._current["options"]]
+            if option.group(1) not in letters:
+                self._current["options"].append(line)
+            return None
+
+        # Looking for correct answer, which closes the question
+        correct = _CORRECT_RE.match(line)
+        if correct:
+            self._current["correct"] = correct.group(1).upper()
+            return self._finish()
+        return None
+
+    def _finish(self):
+        question, self._current = self._current, None
+        if question and question["options"]:
+            return question
+        return None
+
+
+def parse_mcqs(text):
+    """Parses a complete MCQ completion into a list of question dicts."""
+    parser = MCQStreamParser()
+    return parser.feed(text) + parser.close()
+
+
+def parse_rating(feedback, default=3):
+    """Extracts the X from a 'Rating: X/5' line, falling back to a default."""
+    if "Rating:" in feedback:
+        try:
+            rating_text = feedback.split("Rating:")[1].split("\n")[0].strip()
+            return int(rating_text.split("/")[0].strip())
+        except ValueError:
+            pass
+    return default
+
+
+_ANSWER_HEADING_RE = re.compile(r"^[#*\s]*Answer\s+(\d+)\s*[:.)]?[*\s]*$", re.MULTILINE | re.IGNORECASE)
+
+
+def parse_batch_feedback(text, count):
+    """Splits a batch_feedback_agent reply into count per-answer feedbacks.
+
+    Each feedback keeps the 'Rating: X/5' format of a single evaluation. An
+    answer whose block is missing or has no rating comes back as None.
+    """
+    feedbacks = [None] * count
+    headings = list(_ANSWER_HEADING_RE.finditer(text))
+    for heading, following in zip(headings, headings[1:] + [None]):
+        number = int(heading.group(1))
+        block = text[heading.end():following.start() if following else len(text)].strip()
+        if 1 <= number <= count and feedbacks[number - 1] is None and "Rating:" in block:
+            feedbacks[number - 1] = block
+    return feedbacks
+
+
+def format_mcqs(questions):
+    """Renders question dicts back into the mcq_agent output format."""
+    blocks = []
+    for question in questions:
+        block = "\n".join([question["text"], *question["options"]])
+        if question.get("correct"):
+            block += f"\n\nCorrect Answer: {question['correct']}"
+        blocks.append(block)
+    return "\n\n".join(blocks)
+
+
+# "## Key Concepts", "**Examples**", "**2. Examples:**"
+_HEADING_RE = re.compile(r"^(?:#{1,6}\s+(.+?)\s*#*|\*\*\s*(.+?)\s*\*\*:?)$")
+_NUMBERING_RE = re.compile(r"^(?:\d+[.)]|[IVX]+\.)\s*")
+_FENCE_RE = re.compile(r"^(`{3,}|~{3,})")
+
+
+def split_lesson_sections(lesson_content, min_chars=200, max_sections=6):
+    """Splits a lesson into (title, text) sections on its markdown headings.
+
+    Lines inside fenced code blocks are never headings, so '# comments' in
+    code examples stay with their section. Sections shorter than min_chars
+    are merged with a neighbour so every section has enough material to ask
+    about, and the smallest neighbours are merged until at most max_sections
+    remain. A lesson without headings is one section.
+    """
+    # Each section is a list of (heading, body) parts so merges keep every heading once
+    sections = []
+    title, body, fence = None, [], None
+    for line in lesson_content.split("\n"):
+        stripped = line.strip()
+        fence_match = _FENCE_RE.match(stripped)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+        heading = None if fence is not None or fence_match else _HEADING_RE.match(stripped)
+        if heading:
+            if title is not None or any(part.strip() for part in body):
+                sections.append([(title, "\n".join(body).strip())])
+            title = _NUMBERING_RE.sub("", heading.group(1) or heading.group(2)).rstrip(":").strip()
+            body = []
+        else:
+            body.append(line)
+    sections.append([(title, "\n".join(body).strip())])
+    sections = [[(t or "Lesson", text) for t, text in parts] for parts in sections if parts[0][1]]
+
+    def size(parts):
+        return sum(len(text) for _, text in parts)
+
+    # Folding short sections into the previous one
+    merged = []
+    for parts in sections:
+        if merged and (size(parts) < min_chars or size(merged[-1]) < min_chars):
+            merged[-1] = merged[-1] + parts
+        else:
+            merged.append(parts)
+
+    while len(merged) > max_sections:
+        i = min(range(len(merged) - 1), key=lambda j: size(merged[j]) + size(merged[j + 1]))
+        merged[i:i + 2] = [merged[i] + merged[i + 1]]
+
+    result = []
+    for parts in merged:
+        # A merged section is named after its largest part
+        title = max(parts, key=lambda part: len(part[1]))[0]
+        text = parts[0][1] if len(parts) == 1 else "\n\n".join(f"{t}\n{text}" for t, text in parts)
+        result.append((title, text))
+    return result or [("Lesson", lesson_content.strip())]
+
+
+def renumber_mcqs(questions):
+    """Rewrites each question's 'Qn.' prefix to match its position."""
+    renumbered = []
+    for n, question in enumerate(questions, 1):
+        text = re.sub(r"^Q\s*\d+\s*[.:)]?\s*", "", question["text"])
+        renumbered.append({**question, "text": f"Q{n}. {text}"})
+    return renumbered
@@ -0,0 +1,322 @@
+"""Concurrent orchestration of interview steps."""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from coach.dedup import QuestionIndex
+from coach.parsing import MCQStreamParser, parse_batch_feedback, parse_mcqs, parse_rating, renumber_mcqs, split_lesson_sections
+from coach.scheduler import INTERACTIVE, PREFETCH, Cancelled
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+# Shared by every session in the process; each answer submits up to three
+# candidates at once, so it is sized like the round pool
+_prefetch_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="prefetch")
+
+# Per-section MCQ calls; kept apart so a fan-out never waits behind prefetches
+_section_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mcq-section")
+
+# Timed-round generation and grading, which a user is waiting on; a 10-question
+# round needs 10 threads at once, and prefetches must never hold them up
+_round_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="round")
+
+
+def next_difficulty(current_difficulty, rating):
+    """Moves one step up the difficulty ladder on a 4+ rating and one down on 2 or less."""
+    current_index = DIFFICULTIES.index(current_difficulty)
+    if rating >= 4 and current_index < len(DIFFICULTIES) - 1:
+        return DIFFICULTIES[current_index + 1]
+    if rating <= 2 and current_index > 0:
+        return DIFFICULTIES[current_index - 1]
+    return current_difficulty
+
+
+def possible_difficulties(current_difficulty):
+    """Returns every difficulty the next question could have after the current one is rated."""
+    return list(dict.fromkeys(next_difficulty(current_difficulty, rating) for rating in (3, 5, 1)))
+
+
+class QuestionPrefetcher:
+    """Generates one candidate next question per possible difficulty outcome in the background.
+
+    Start it before evaluating an answer, then ``take`` the candidate matching the
+    difficulty the rating selects. The candidate at the current difficulty, the
+    most likely pick, runs in the scheduler's interactive lane and the others in
+    its prefetch lane; those not taken are cancelled while queued or backing off
+    and discarded otherwise.
+    """
+
+    def __init__(self, agents, subject, topic, current_difficulty, question_index=None):
+        # Candidates are checked against the index, only the chosen one is recorded
+        self.question_index = question_index
+        self._candidates = {}
+        for difficulty in possible_difficulties(current_difficulty):
+            cancel_event = threading.Event()
+            priority = INTERACTIVE if difficulty == current_difficulty else PREFETCH
+            future = _prefetch_executor.submit(
+                agents.generate_next_interview_question, subject, topic, difficulty,
+                question_index=question_index, record=False,
+                priority=priority, cancel_event=cancel_event)
+            self._candidates[difficulty] = (future, cancel_event)
+
+    def take(self, difficulty):
+        """Blocks until the candidate for the given difficulty is ready, records and returns it."""
+        future, _ = self._candidates.pop(difficulty)
+        self.cancel()
+        question = future.result()
+        if self.question_index is not None:
+            self.question_index.add(question)
+        return question
+
+    def cancel(self):
+        """Drops every candidate that has not been taken; safe to call again after take."""
+        for future, cancel_event in self._candidates.values():
+            cancel_event.set()
+            future.cancel()
+        self._candidates.clear()
+
+
+def generate_round_questions(agents, subject, topic, difficulty, count, question_index=None):
+    """Generates count distinct interview questions for a timed round concurrently.
+
+    Concurrent candidates cannot see each other, so each is checked against
+    the ones kept before it and regenerated once if it repeats one. Kept
+    questions are recorded in question_index.
+    """
+    if question_index is None:
+        question_index = QuestionIndex()
+    futures = [
+        _round_executor.submit(agents.generate_next_interview_question, subject, topic, difficulty,
+                               question_index=question_index, record=False)
+        for _ in range(count)]
+
+    questions = []
+    for future in futures:
+        question = future.result()
+        if question_index.is_duplicate(question):
+            question = agents.generate_next_interview_question(subject, topic, difficulty, question_index=question_index, record=False)
+        question_index.add(question)
+        questions.append(question)
+    return questions
+
+
+def evaluate_round(agents, questions, answers, batch_size=5):
+    """Scores a round of answers in batched calls, returning one {feedback, rating} per question.
+
+    Batches of up to batch_size answers are evaluated concurrently, one call
+    each. Any answer missing from its batch's reply is evaluated on its own.
+    """
+    batches = [range(start, min(start + batch_size, len(questions))) for start in range(0, len(questions), batch_size)]
+    futures = [
+        _round_executor.submit(agents.evaluate_answers, [(questions[i], answers[i]) for i in batch])
+        for batch in batches]
+
+    results = []
+    for batch, future in zip(batches, futures):
+        for i, feedback in zip(batch, parse_batch_feedback(future.result(), len(batch))):
+            if feedback is None:
+                feedback = agents.evaluate_answer(questions[i], answers[i])
+            results.append({"feedback": feedback, "rating": parse_rating(feedback)})
+    return results
+
+
+def round_difficulty(current_difficulty, ratings):
+    """Moves the difficulty ladder on the rounded average rating of a round."""
+    return next_difficulty(current_difficulty, round(sum(ratings) / len(ratings)) if ratings else 3)
+
+
+def allocate_mcqs(sections, num_questions):
+    """Splits num_questions across (title, text) sections in proportion to their length.
+
+    Every section gets at least one question when there are enough to go
+    round; otherwise only the longest sections get one each.
+    """
+    sizes = [len(text) for _, text in sections]
+    order = sorted(range(len(sections)), key=lambda i: -sizes[i])
+    if num_questions <= len(sections):
+        chosen = set(order[:num_questions])
+        return [int(i in chosen) for i in range(len(sections))]
+
+    # Largest remainder apportionment of what is left after one each
+    spare = num_questions - len(sections)
+    shares = [spare * size / (sum(sizes) or 1) for size in sizes]
+    counts = [1 + int(share) for share in shares]
+    by_remainder = sorted(range(len(sections)), key=lambda i: int(shares[i]) - shares[i])
+    for i in by_remainder[:num_questions - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def _mcq_signature(question):
+    # Options are part of the signature so same-stem questions on different choices survive
+    return " ".join([question["text"], *question["options"]])
+
+
+def merge_section_mcqs(section_results, num_questions, threshold=0.7):
+    """Merges per-section MCQs into exactly num_questions where possible, numbered Q1..Qn.
+
+    section_results holds (title, questions, target) in lesson order. Near-
+    duplicates across sections are dropped, each section contributes up to its
+    target, and shortfalls are filled round-robin from the other sections'
+    extras. Every question is tagged with its section title as its 'topic'.
+    """
+    index = QuestionIndex(threshold=threshold)
+    picked, spare = [], []
+    for title, questions, target in section_results:
+        unique = []
+        for question in questions:
+            signature = _mcq_signature(question)
+            if index.is_duplicate(signature):
+                continue
+            index.add(signature)
+            unique.append({**question, "topic": title})
+        picked.append(unique[:target])
+        spare.append(unique[target:])
+
+    missing = num_questions - sum(len(section) for section in picked)
+    while missing > 0 and any(spare):
+        for i, extra in enumerate(spare):
+            if extra and missing > 0:
+                picked[i].append(extra.pop(0))
+                missing -= 1
+
+    return renumber_mcqs([question for section in picked for question in section][:num_questions])
+
+
+class SectionedMCQGenerator:
+    """Generates a lesson's MCQs section by section, then merges them.
+
+    The lesson is split on its headings, questions are apportioned by section
+    length and every section is asked for one more than its share as slack
+    for duplicates and unparseable output. Each section call is streamed
+    through its own parser, so questions surface as soon as they complete in
+    any section. By default all section calls run at once and wall time
+    follows the largest section; with parallel=False they run one after
+    another in the caller's thread. A banked MCQ set for the whole lesson is
+    served as is unless fresh. cancel() stops queued and streaming sections
+    alike.
+    """
+
+    def __init__(self, agents, lesson_content, num_questions, fresh=False, priority=INTERACTIVE, parallel=True):
+        self.agents = agents
+        self.lesson_content = lesson_content
+        self.num_questions = num_questions
+        self.fresh = fresh
+        self.priority = priority
+        self.parallel = parallel
+        self.banked = None if fresh else agents.get_banked_mcqs(lesson_content, num_questions)
+        self._sections = []
+        self._futures = []
+        self._completed = queue.Queue()
+        self._cancelled = threading.Event()
+        if self.banked:
+            return
+
+        sections = split_lesson_sections(lesson_content)
+        for (title, text), target in zip(sections, allocate_mcqs(sections, num_questions)):
+            if target:
+                self._sections.append({"title": title, "text": f"## {title}\n{text}", "target": target,
+                                       "questions": [], "error": None, "done": False})
+        if parallel:
+            self._futures = [_section_executor.submit(self._run_section, section) for section in self._sections]
+
+    def _until_cancelled(self, chunks):
+        # Stops reading a section's stream between chunks once cancelled
+        try:
+            for chunk in chunks:
+                if self._cancelled.is_set():
+                    return
+                yield chunk
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def _stream_section(self, section):
+        # Yields the section's questions as its stream completes them
+        try:
+            if self._cancelled.is_set():
+                raise Cancelled()
+            chunks = self.agents.generate_mcqs_from_lesson(
+                section["text"], section["target"] + 1, stream=True, fresh=self.fresh, priority=self.priority,
+                cancel_event=self._cancelled)
+            for question in MCQStreamParser().iter_questions(self._until_cancelled(chunks)):
+                section["questions"].append(question)
+                yield question
+        except Exception as exc:
+            section["error"] = exc
+        finally:
+            section["done"] = True
+
+    def _run_section(self, section):
+        try:
+            for question in self._stream_section(section):
+                self._completed.put((section["title"], question))
+        finally:
+            self._completed.put(section)
+
+    def iter_questions(self):
+        """Yields (section title, question) as each question finishes streaming."""
+        if self.banked:
+            for question in self.banked:
+                yield "Lesson", question
+            return
+
+        if not self.parallel:
+            for section in self._sections:
+                if not section["done"]:
+                    for question in self._stream_section(section):
+                        yield section["title"], question
+            return
+
+        remaining = len(self._futures)
+        while remaining:
+            item = self._completed.get()
+            if isinstance(item, dict):
+                remaining -= 1
+            else:
+                yield item
+
+    def result(self):
+        """Blocks until every section is done and returns the merged, renumbered questions.
+
+        Failed sections contribute nothing unless every section failed. A
+        shortfall after merging is topped up by one call over the whole lesson.
+        Raises Cancelled once cancel() has been called.
+        """
+        if self.banked:
+            return renumber_mcqs(self.banked)
+
+        if self.parallel:
+            wait(self._futures)
+        else:
+            for _ in self.iter_questions():
+                pass
+        if self._cancelled.is_set():
+            raise Cancelled()
+        errors = [section["error"] for section in self._sections if section["error"] is not None]
+        if errors and len(errors) == len(self._sections):
+            raise errors[0]
+
+        results = [(section["title"], section["questions"], section["target"]) for section in self._sections]
+        questions = merge_section_mcqs(results, self.num_questions)
+        missing = self.num_questions - len(questions)
+        if missing > 0:
+            extra = parse_mcqs(self.agents.generate_mcqs_from_lesson(
+                self.lesson_content, missing + 1, fresh=self.fresh, priority=self.priority))
+            questions = merge_section_mcqs(results + [("Review", extra, 0)], self.num_questions)
+        return questions
+
+    def cancel(self):
+        """Drops queued section calls and stops streaming ones at their next chunk."""
+        self._cancelled.set()
+        for section, future in zip(self._sections, self._futures):
+            # A section dropped before it started still marks itself done for iter_questions
+            if future.cancel():
+                section["done"] = True
+                self._completed.put(section)
+
+
+def generate_mcqs_map_reduce(agents, lesson_content, num_questions, fresh=False, priority=INTERACTIVE, parallel=True):
+    """Returns num_questions MCQ dicts generated section by section."""
+    return SectionedMCQGenerator(agents, lesson_content, num_questions, fresh, priority, parallel).result()
@@ -0,0 +1,162 @@
+"""Rate-limit-aware scheduling of LLM calls shared by every session in the process."""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Priority lanes, lower runs first
+INTERACTIVE = 0
+PREFETCH = 1
+BATCH = 2
+
+
+class Cancelled(Exception):
+    """Raised when a scheduled call is cancelled before it completes."""
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute up to a capacity of one minute's worth."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount, now):
+        """Returns how long until amount can be taken, 0 if it can be taken now."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+def is_retryable(exc):
+    """Tells whether an error is a rate limit, timeout or server error worth retrying."""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    message = str(exc).lower()
+    return "429" in message or "rate limit" in message or "timed out" in message or "connection" in message
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RequestScheduler:
+    """Admits LLM calls under requests/min, tokens/min and concurrency limits.
+
+    Waiting calls are admitted strictly by priority lane, then in arrival
+    order, so interactive feedback overtakes queued prefetch and batch work.
+    Rate limits, timeouts and server errors are retried with full-jitter
+    exponential backoff, honouring Retry-After. A set cancel_event aborts a
+    call while it is queued or backing off.
+    """
+
+    def __init__(self, requests_per_minute=30, tokens_per_minute=12000, max_concurrency=8,
+                 max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @property
+    def queued(self):
+        """Number of calls waiting for admission."""
+        with self._condition:
+            return len(self._waiters)
+
+    def acquire(self, priority=INTERACTIVE, tokens=0, cancel_event=None):
+        """Blocks until a call may start, reserving a concurrency slot and rate budget."""
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise Cancelled()
+                    delay = 0.25
+                    if self._waiters[0] == entry and self._active < self.max_concurrency:
+                        now = time.monotonic()
+                        wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+                        if wait == 0:
+                            self._requests.take(1)
+                            self._tokens.take(tokens)
+                            self._active += 1
+                            return
+                        delay = min(delay, wait)
+                    self._condition.wait(delay)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def release(self):
+        """Frees the concurrency slot taken by acquire."""
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority=INTERACTIVE, tokens=0, cancel_event=None):
+        """Holds an admitted slot for the duration of the block."""
+        self.acquire(priority, tokens, cancel_event)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def call(self, fn, priority=INTERACTIVE, tokens=0, cancel_event=None):
+        """Runs fn() once admitted, retrying retryable errors with backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot(priority, tokens, cancel_event):
+                    return fn()
+            except Exception as exc:
+                if isinstance(exc, Cancelled) or attempt == self.max_retries or not is_retryable(exc):
+                    raise
+                self._backoff(attempt, exc, cancel_event)
+
+    def stream(self, open_stream, priority=INTERACTIVE, tokens=0, cancel_event=None):
+        """Yields from open_stream() once admitted, holding the slot until the stream ends.
+
+        Errors before the first item are retried; once output has been yielded
+        they propagate, since the consumer has already shown partial output.
+        """
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                with self.slot(priority, tokens, cancel_event):
+                    for item in open_stream():
+                        started = True
+                        yield item
+                return
+            except Exception as exc:
+                if started or isinstance(exc, Cancelled) or attempt == self.max_retries or not is_retryable(exc):
+                    raise
+                self._backoff(attempt, exc, cancel_event)
+
+    def _backoff(self, attempt, exc, cancel_event):
+        delay = max(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)), _retry_after(exc))
+        if cancel_event is not None:
+            if cancel_event.wait(delay):
+                raise Cancelled()
+        else:
+            time.sleep(delay)
@@ -0,0 +1,80 @@
+"""Deterministic, in-process grading of MCQ answers."""
+
+
+def score_mcqs(questions, answers, default_topic="General"):
+    """Grades MCQ answers against each question's parsed correct letter.
+
+    Questions whose correct answer could not be parsed are reported as
+    ungraded and left out of the score.
+    """
+    results = []
+    topics = {}
+    score = 0
+    graded = 0
+
+    for i, question in enumerate(questions):
+        expected = question.get("correct")
+        user_answer = answers.get(i)
+        topic = question.get("topic") or default_topic
+
+        if expected is None:
+            results.append({"index": i, "topic": topic, "answer": user_answer, "correct": None, "is_correct": None})
+            continue
+
+        is_correct = user_answer == expected
+        graded += 1
+        score += is_correct
+
+        breakdown = topics.setdefault(topic, {"correct": 0, "total": 0})
+        breakdown["total"] += 1
+        breakdown["correct"] += is_correct
+
+        results.append({"index": i, "topic": topic, "answer": user_answer, "correct": expected, "is_correct": is_correct})
+
+    return {
+        "score": score,
+        "total": graded,
+        "ungraded": len(questions) - graded,
+        "percentage": round(100 * score / graded, 1) if graded else 0.0,
+        "results": results,
+        "topics": topics,
+    }
+
+
+def missed_questions(questions, score):
+    """Returns the questions that were answered wrongly or left blank."""
+    return [(questions[r["index"]], r) for r in score["results"] if r["is_correct"] is False]
+
+
+def format_score_report(score):
+    """Renders a score from score_mcqs as a short markdown report."""
+    report = f"**Score: {score['score']}/{score['total']} ({score['percentage']}%)**\n\n"
+    if score["ungraded"]:
+        report += f"{score['ungraded']} question(s) had no parsable correct answer and were not graded.\n\n"
+
+    for r in score["results"]:
+        if r["is_correct"] is None:
+            status = "not graded"
+        elif r["is_correct"]:
+            status = "✅ correct"
+        else:
+            status = f"❌ your answer: {r['answer'] or 'none'}, correct: {r['correct']}"
+        report += f"- Q{r['index'] + 1}: {status}\n"
+
+    if score["topics"]:
+        report += "\n**By topic:**\n"
+        for topic, breakdown in score["topics"].items():
+            report += f"- {topic}: {breakdown['correct']}/{breakdown['total']}\n"
+    return report
+
+
+def format_misses_for_review(misses):
+    """Builds the explanation prompt body covering only the missed questions."""
+    text = "Here are the MCQs the user got wrong:\n\n"
+    for question, result in misses:
+        text += f"{question['text']}\n"
+        for option in question["options"]:
+            text += f"{option}\n"
+        text += f"Correct Answer: {result['correct']}\n"
+        text += f"User's Answer: {result['answer'] or 'No answer'}\n\n"
+    return text
@@ -0,0 +1,442 @@
+"""Headless asyncio HTTP API over TutorAgents, for separate frontends and load tests.
+
+    python -m coach.server --port 8000 --workers 4
+
+Requests and responses are JSON. Endpoints that accept ``"stream": true``
+answer with a chunked body written as the text is generated: plain text for
+lessons, evaluations and reports, and for MCQs one JSON object per line for
+each finished question followed by the merged list.
+
+    POST /lesson            {subject, topic?, fresh?, stream?=true}
+    POST /mcqs              {lesson, num_questions?=5, fresh?, stream?=false}
+    POST /grade             {questions, answers, topic?, explain?=false}
+    POST /questions/next    {subject, topic?, difficulty?, asked?}
+    POST /rounds/questions  {subject, topic?, difficulty?, count?=5, asked?}
+    POST /evaluate          {question, answer, stream?=true}
+    POST /rounds/evaluate   {questions, answers}
+    POST /report            {mcq_scores?, interviews?, stream?=true}
+    GET  /metrics
+    GET  /healthz
+
+The API keeps no session state, so any worker can serve any request: clients
+send the questions already asked, and the scores and ratings the report is
+built from.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from coach.dedup import QuestionIndex
+from coach.parsing import parse_rating
+from coach.pipeline import DIFFICULTIES, SectionedMCQGenerator, evaluate_round, generate_round_questions
+from coach.scoring import format_misses_for_review, missed_questions, score_mcqs
+from coach.summary import PerformanceSummary
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+_REQUIRED = object()
+_DONE = object()
+
+
+class HTTPError(Exception):
+    """Raised by handlers to answer with an error status and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Stream:
+    """A handler result sent as a chunked body, fed by a blocking generator function."""
+
+    def __init__(self, produce, content_type="text/plain; charset=utf-8"):
+        self.produce = produce
+        self.content_type = content_type
+
+
+def _field(data, name, default=_REQUIRED, kind=None):
+    """Returns data[name], checking its type, or default when it is missing."""
+    if name not in data or data[name] is None:
+        if default is _REQUIRED:
+            raise HTTPError(400, f"missing field {name!r}")
+        return default
+    value = data[name]
+    if kind is not None and not isinstance(value, kind) or kind is int and isinstance(value, bool):
+        raise HTTPError(400, f"field {name!r} has the wrong type")
+    return value
+
+
+def _difficulty(data):
+    difficulty = _field(data, "difficulty", "Medium", str)
+    if difficulty not in DIFFICULTIES:
+        raise HTTPError(400, f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+    return difficulty
+
+
+def _answers(data, count):
+    """Reads MCQ or interview answers sent as a list or as an {index: answer} object."""
+    answers = _field(data, "answers", kind=(list, dict))
+    if isinstance(answers, dict):
+        try:
+            return {int(i): answer for i, answer in answers.items()}
+        except ValueError:
+            raise HTTPError(400, "answer keys must be question indexes")
+    if len(answers) > count:
+        raise HTTPError(400, "more answers than questions")
+    return dict(enumerate(answers))
+
+
+def _mcq_questions(data):
+    """Reads MCQ objects with a 'text', a list of 'options' and an optional 'correct' letter and 'topic'."""
+    questions = _field(data, "questions", kind=list)
+    for question in questions:
+        if not (isinstance(question, dict) and isinstance(question.get("text"), str)
+                and isinstance(question.get("options"), list)
+                and all(isinstance(option, str) for option in question["options"])
+                and isinstance(question.get("correct"), (str, type(None)))
+                and isinstance(question.get("topic"), (str, type(None)))):
+            raise HTTPError(400, "questions must be objects with 'text', 'options' and 'correct'")
+    return questions
+
+
+def _asked_index(data):
+    """Builds a throwaway question index from the questions a client has already been asked."""
+    index = QuestionIndex()
+    for question in _field(data, "asked", [], list):
+        if isinstance(question, str):
+            index.add(question)
+    return index
+
+
+class CoachAPI:
+    """Routes HTTP requests to TutorAgents, running blocking agent calls on a thread pool."""
+
+    def __init__(self, agents, executor):
+        self.agents = agents
+        self.executor = executor
+        self.routes = {
+            ("POST", "/lesson"): self.lesson,
+            ("POST", "/mcqs"): self.mcqs,
+            ("POST", "/grade"): self.grade,
+            ("POST", "/questions/next"): self.next_question,
+            ("POST", "/rounds/questions"): self.round_questions,
+            ("POST", "/evaluate"): self.evaluate,
+            ("POST", "/rounds/evaluate"): self.evaluate_round,
+            ("POST", "/report"): self.report,
+            ("GET", "/metrics"): self.metrics,
+            ("GET", "/healthz"): self.healthz,
+        }
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs a blocking call on the thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def lesson(self, data):
+        subject = _field(data, "subject", kind=str)
+        topic = _field(data, "topic", "", str).strip() or subject
+        fresh = bool(data.get("fresh"))
+        if data.get("stream", True):
+            return Stream(lambda: self.agents.generate_lesson(subject, topic, stream=True, fresh=fresh))
+        return {"lesson": await self.run(self.agents.generate_lesson, subject, topic, fresh=fresh)}
+
+    async def mcqs(self, data):
+        lesson = _field(data, "lesson", kind=str)
+        num_questions = min(20, max(1, _field(data, "num_questions", 5, int)))
+        fresh = bool(data.get("fresh"))
+
+        def questions():
+            generator = SectionedMCQGenerator(self.agents, lesson, num_questions, fresh=fresh)
+            for title, question in generator.iter_questions():
+                yield json.dumps({"section": title, "question": question}) + "\n"
+            yield json.dumps({"questions": generator.result()}) + "\n"
+
+        if data.get("stream"):
+            return Stream(questions, "application/x-ndjson")
+        generator = await self.run(SectionedMCQGenerator, self.agents, lesson, num_questions, fresh=fresh)
+        return {"questions": await self.run(generator.result)}
+
+    async def grade(self, data):
+        questions = _mcq_questions(data)
+        answers = _answers(data, len(questions))
+        score = score_mcqs(questions, answers, _field(data, "topic", "General", str))
+        misses = missed_questions(questions, score)
+        if data.get("explain") and misses:
+            score["explanation"] = await self.run(self.agents.evaluate_mcq_answers, format_misses_for_review(misses))
+        return score
+
+    async def next_question(self, data):
+        subject = _field(data, "subject", kind=str)
+        topic = _field(data, "topic", "", str).strip() or subject
+        question = await self.run(
+            self.agents.generate_next_interview_question, subject, topic, _difficulty(data),
+            question_index=_asked_index(data))
+        return {"question": question}
+
+    async def round_questions(self, data):
+        subject = _field(data, "subject", kind=str)
+        topic = _field(data, "topic", "", str).strip() or subject
+        count = min(10, max(1, _field(data, "count", 5, int)))
+        questions = await self.run(
+            generate_round_questions, self.agents, subject, topic, _difficulty(data), count, _asked_index(data))
+        return {"questions": questions}
+
+    async def evaluate(self, data):
+        question = _field(data, "question", kind=str)
+        answer = _field(data, "answer", kind=str)
+        if data.get("stream", True):
+            return Stream(lambda: self.agents.evaluate_answer(question, answer, stream=True))
+        feedback = await self.run(self.agents.evaluate_answer, question, answer)
+        return {"feedback": feedback, "rating": parse_rating(feedback)}
+
+    async def evaluate_round(self, data):
+        questions = _field(data, "questions", kind=list)
+        answers = _answers(data, len(questions))
+        answers = [str(answers.get(i) or "") for i in range(len(questions))]
+        return {"results": await self.run(evaluate_round, self.agents, questions, answers)}
+
+    async def report(self, data):
+        summary = PerformanceSummary()
+        try:
+            for score in _field(data, "mcq_scores", [], list):
+                summary.add_mcq_score(score)
+            for interview in _field(data, "interviews", [], list):
+                summary.add_interview(
+                    int(interview["rating"]), interview.get("difficulty", "Medium"),
+                    interview.get("feedback", ""), interview.get("topic"))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise HTTPError(400, "mcq_scores must be /grade results and interviews need a 'rating'")
+        if not summary.mcq_attempts and not summary.interview_count:
+            raise HTTPError(400, "send at least one MCQ score or rated interview answer")
+
+        mcq_results, interview_results = summary.mcq_results(), summary.interview_results()
+        if data.get("stream", True):
+            return Stream(lambda: self.agents.get_overall_performance(mcq_results, interview_results, stream=True))
+        return {"report": await self.run(self.agents.get_overall_performance, mcq_results, interview_results)}
+
+    async def metrics(self, data):
+        return self.agents.metrics.render_prometheus()
+
+    async def healthz(self, data):
+        return {"status": "ok", "pid": os.getpid()}
+
+    async def handle(self, reader, writer):
+        """Serves HTTP/1.1 requests on one connection until it closes."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, {"error": "request headers too large"}, keep_alive=False)
+                    return
+
+                try:
+                    method, path, keep_alive, body = await self._read_request(reader, head)
+                except HTTPError as exc:
+                    await self._send(writer, exc.status, {"error": exc.message}, keep_alive=False)
+                    return
+
+                if not await self._dispatch(writer, method, path, body, keep_alive) or not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, head):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "chunked request bodies are not supported, send Content-Length")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"request body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method, target.split("?", 1)[0], keep_alive, body
+
+    async def _dispatch(self, writer, method, path, body, keep_alive):
+        """Runs the matching handler and writes its response, returning False if the connection broke."""
+        handler = self.routes.get((method, path))
+        try:
+            if handler is None:
+                if any(route_path == path for _, route_path in self.routes):
+                    raise HTTPError(405, f"{method} not allowed on {path}")
+                raise HTTPError(404, f"no route for {path}")
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                raise HTTPError(400, "body is not valid JSON")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "body must be a JSON object")
+            result = await handler(data)
+        except HTTPError as exc:
+            await self._send(writer, exc.status, {"error": exc.message}, keep_alive)
+            return True
+        except Exception:
+            # Details stay in the server log, they can include prompts or provider internals
+            logger.exception("%s %s failed", method, path)
+            await self._send(writer, 500, {"error": "internal server error"}, keep_alive)
+            return True
+
+        if isinstance(result, Stream):
+            return await self._stream(writer, result, keep_alive)
+        await self._send(writer, 200, result, keep_alive)
+        return True
+
+    async def _send(self, writer, status, payload, keep_alive):
+        # Handlers return text for plain text responses and anything else as JSON
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        writer.write(self._head(status, content_type, keep_alive, f"Content-Length: {len(body)}") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _stream(self, writer, stream, keep_alive):
+        """Writes a Stream as chunks as soon as its blocking generator yields them."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stopped = False
+
+        def pump():
+            # The generator runs on the pool; stopping between items closes it early
+            try:
+                for item in stream.produce():
+                    if stopped:
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as exc:
+                logger.exception("streamed response failed")
+                loop.call_soon_threadsafe(queue.put_nowait, exc)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+        loop.run_in_executor(self.executor, pump)
+        writer.write(self._head(200, stream.content_type, keep_alive, "Transfer-Encoding: chunked"))
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    # Headers are already out, so an unterminated body is how the client learns of it
+                    return False
+                data = item.encode("utf-8")
+                if data:
+                    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return True
+        except ConnectionError:
+            return False
+        finally:
+            stopped = True
+
+    def _head(self, status, content_type, keep_alive, length_header):
+        return (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: {content_type}\r\n{length_header}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+
+
+async def serve(sock, agents, threads=64):
+    """Serves the API on an already bound listening socket until cancelled."""
+    api = CoachAPI(agents, ThreadPoolExecutor(max_workers=threads, thread_name_prefix="api"))
+    server = await asyncio.start_server(api.handle, sock=sock, limit=MAX_HEADER_BYTES)
+    async with server:
+        await server.serve_forever()
+
+
+def _run_worker(sock, api_key, processes, threads):
+    from coach.agents import create_agents
+
+    # Agents, their threads and SQLite connections are created after the fork
+    agents = create_agents(api_key, processes=processes)
+    try:
+        asyncio.run(serve(sock, agents, threads))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m coach.server", description="Serve the coach as a JSON HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing the listening socket")
+    parser.add_argument("--threads", type=int, default=64, help="threads per worker for blocking agent calls")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key and os.getenv("LLM_BACKEND", "groq") != "fake":
+        parser.error("GROQ_API_KEY is missing. Please set it in your environment variables.")
+    if args.workers > 1 and not hasattr(os, "fork"):
+        parser.error("--workers needs a platform with fork")
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s)", file=sys.stderr)
+    if args.workers == 1:
+        _run_worker(sock, api_key, 1, args.threads)
+        return 0
+
+    # Every worker accepts on the same socket and the kernel spreads connections
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(sock, api_key, args.workers, args.threads)
+            os._exit(0)
+        children.append(pid)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except (KeyboardInterrupt, SystemExit):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Durable session state and an append-only per-user progress log."""
+
+import re
+import secrets
+import time
+
+from coach.db import SQLiteStore, pack, unpack
+
+DEFAULT_STORE_PATH = ".coach_sessions.sqlite3"
+
+# Event kinds written to the progress log
+INTERVIEW = "interview"
+MCQ = "mcq"
+REPORT = "report"
+
+# Shape of the keys new_user_id hands out, 128 random bits in URL-safe base64
+_USER_ID_RE = re.compile(r"[A-Za-z0-9_-]{22,64}")
+
+
+def new_user_id():
+    """Returns an unguessable key to track one user's progress under."""
+    return secrets.token_urlsafe(16)
+
+
+def is_user_id(value):
+    """Tells whether a value is shaped like a key from new_user_id, unlike a name someone could guess."""
+    return bool(_USER_ID_RE.fullmatch(value or ""))
+
+
+class SessionStore(SQLiteStore):
+    """SQLite store of session state and the events a dashboard charts.
+
+    A session's state is kept as one small row per key, and a checkpoint only
+    rewrites the keys that changed. Graded MCQ attempts, rated answers and
+    reports are appended to an events table indexed by user and time, so
+    progress queries never touch session state or an LLM. Answered questions
+    live only in their events, and a session's interview history is read
+    back from them. A checkpoint writes its values and events in one
+    transaction.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        super().__init__(path, synchronous="NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, user_id TEXT, updated REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_user ON sessions (user_id, updated)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_values ("
+            "session_id TEXT, key TEXT, value BLOB, PRIMARY KEY (session_id, key))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY, session_id TEXT, user_id TEXT, ts REAL, kind TEXT, "
+            "subject TEXT, topic TEXT, difficulty TEXT, rating INTEGER, correct INTEGER, total INTEGER, "
+            "payload BLOB)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS events_user ON events (user_id, kind, ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS events_session ON events (session_id, kind, ts)")
+
+    def checkpoint(self, session_id, user_id, values, events=()):
+        """Upserts the session's changed values and appends its new events atomically.
+
+        values maps state keys to JSON-compatible values; keys left out keep
+        their saved value. Events are dicts with a 'kind' and optionally
+        'subject', 'topic', 'difficulty', 'rating', 'correct', 'total' and a
+        JSON 'payload'.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, user_id, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET user_id = excluded.user_id, updated = excluded.updated",
+                (session_id, user_id, now),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_values (session_id, key, value) VALUES (?, ?, ?)",
+                [(session_id, key, pack(value)) for key, value in values.items()],
+            )
+            conn.executemany(
+                "INSERT INTO events (session_id, user_id, ts, kind, subject, topic, difficulty, rating, correct, total, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (session_id, user_id, now, event["kind"], event.get("subject"), event.get("topic"),
+                     event.get("difficulty"), event.get("rating"), event.get("correct"), event.get("total"),
+                     pack(event["payload"]) if event.get("payload") is not None else None)
+                    for event in events
+                ],
+            )
+
+    def load(self, session_id):
+        """Returns (user_id, values) of a checkpointed session, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT user_id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            values = self._conn.execute(
+                "SELECT key, value FROM session_values WHERE session_id = ?", (session_id,)).fetchall()
+        return row[0], {key: unpack(value) for key, value in values}
+
+    def interview_history(self, session_id, since=None):
+        """Returns a session's rated answers, oldest first, as question/answer/feedback/rating/difficulty dicts."""
+        query = "SELECT payload, rating, difficulty FROM events WHERE session_id = ? AND kind = ?"
+        params = [session_id, INTERVIEW]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [dict(unpack(payload), rating=rating, difficulty=difficulty) for payload, rating, difficulty in rows]
+
+    def recent_sessions(self, user_id, limit=10):
+        """Returns (session_id, updated) of a user's most recently active sessions."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT session_id, updated FROM sessions WHERE user_id = ? ORDER BY updated DESC LIMIT ?",
+                (user_id, limit)).fetchall()
+
+    def events(self, user_id, kind=None, since=None, limit=1000):
+        """Returns a user's most recent events, oldest first, without their payloads."""
+        query = "SELECT ts, session_id, kind, subject, topic, difficulty, rating, correct, total FROM events WHERE user_id = ?"
+        params = [user_id]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        query += " ORDER BY ts DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        columns = ("ts", "session_id", "kind", "subject", "topic", "difficulty", "rating", "correct", "total")
+        return [dict(zip(columns, row)) for row in reversed(rows)]
+
+    def progress(self, user_id):
+        """Aggregates a user's daily rating trend, MCQ accuracy and per-topic averages."""
+        with self._lock:
+            daily = self._conn.execute(
+                "SELECT date(ts, 'unixepoch', 'localtime') AS day, AVG(rating), COUNT(*) FROM events "
+                "WHERE user_id = ? AND kind = ? GROUP BY day ORDER BY day",
+                (user_id, INTERVIEW)).fetchall()
+            mcq_daily = self._conn.execute(
+                "SELECT date(ts, 'unixepoch', 'localtime') AS day, SUM(correct), SUM(total), COUNT(*) FROM events "
+                "WHERE user_id = ? AND kind = ? GROUP BY day ORDER BY day",
+                (user_id, MCQ)).fetchall()
+            topics = self._conn.execute(
+                "SELECT subject, topic, AVG(rating), COUNT(*) FROM events "
+                "WHERE user_id = ? AND kind = ? GROUP BY subject, topic ORDER BY AVG(rating)",
+                (user_id, INTERVIEW)).fetchall()
+            sessions = self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE user_id = ?", (user_id,)).fetchone()[0]
+        return {
+            "sessions": sessions,
+            "daily_ratings": [{"day": day, "average_rating": average, "answers": count} for day, average, count in daily],
+            "daily_mcqs": [
+                {"day": day, "accuracy": correct / total if total else None, "attempts": count}
+                for day, correct, total, count in mcq_daily],
+            "topics": [
+                {"subject": subject, "topic": topic, "average_rating": average, "answers": count}
+                for subject, topic, average, count in topics],
+        }
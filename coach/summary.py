@@ -0,0 +1,154 @@
+"""Bounded running aggregate of a session's results for the report agent."""
+
+import re
+from collections import deque
+
+from coach.pipeline import DIFFICULTIES
+
+_SENTENCE_RE = re.compile(r"(.+?[.!?])(\s|$)", re.DOTALL)
+
+
+def _digest_feedback(feedback, max_chars):
+    """Compresses feedback to its first sentence after the rating line."""
+    text = feedback.split("Feedback:", 1)[-1]
+    text = " ".join(text.replace("*", "").split())
+    match = _SENTENCE_RE.match(text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars - 1].rstrip() + "…"
+
+
+class PerformanceSummary:
+    """Running per-session stats that render to a fixed-size report prompt.
+
+    Updated incrementally as MCQs are graded and answers are rated, so the
+    report prompt stays the same size whether a user answered 3 questions or
+    300. The prompt holds per-difficulty rating stats, MCQ accuracy across all
+    attempts, the weakest topics, and a rolling digest of the most recent
+    feedback.
+    """
+
+    def __init__(self, digest_size=6, digest_chars=160, max_weak_topics=3):
+        self.digest_chars = digest_chars
+        self.max_weak_topics = max_weak_topics
+        self.ratings = {difficulty: {"count": 0, "total": 0, "min": None, "max": None} for difficulty in DIFFICULTIES}
+        self.recent_ratings = deque(maxlen=10)
+        self.mcq_correct = 0
+        self.mcq_total = 0
+        self.mcq_attempts = 0
+        self.topics = {}
+        self.digest = deque(maxlen=digest_size)
+
+    def state(self):
+        """Returns the summary as JSON-serializable data for from_state."""
+        return {
+            "digest_size": self.digest.maxlen,
+            "digest_chars": self.digest_chars,
+            "max_weak_topics": self.max_weak_topics,
+            "ratings": self.ratings,
+            "recent_ratings": list(self.recent_ratings),
+            "mcq_correct": self.mcq_correct,
+            "mcq_total": self.mcq_total,
+            "mcq_attempts": self.mcq_attempts,
+            "topics": self.topics,
+            "digest": list(self.digest),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuilds a summary saved with state."""
+        summary = cls(state["digest_size"], state["digest_chars"], state["max_weak_topics"])
+        summary.ratings.update(state["ratings"])
+        summary.recent_ratings.extend(state["recent_ratings"])
+        summary.mcq_correct = state["mcq_correct"]
+        summary.mcq_total = state["mcq_total"]
+        summary.mcq_attempts = state["mcq_attempts"]
+        summary.topics = state["topics"]
+        summary.digest.extend(state["digest"])
+        return summary
+
+    @property
+    def interview_count(self):
+        return sum(stats["count"] for stats in self.ratings.values())
+
+    def _topic(self, topic):
+        return self.topics.setdefault(topic, {"mcq_correct": 0, "mcq_total": 0, "rating_total": 0, "rating_count": 0})
+
+    def add_interview(self, rating, difficulty, feedback, topic=None):
+        """Folds one rated interview answer into the summary."""
+        stats = self.ratings.setdefault(difficulty, {"count": 0, "total": 0, "min": None, "max": None})
+        stats["count"] += 1
+        stats["total"] += rating
+        stats["min"] = rating if stats["min"] is None else min(stats["min"], rating)
+        stats["max"] = rating if stats["max"] is None else max(stats["max"], rating)
+        self.recent_ratings.append(rating)
+
+        if topic:
+            topic_stats = self._topic(topic)
+            topic_stats["rating_total"] += rating
+            topic_stats["rating_count"] += 1
+
+        self.digest.append(f"{difficulty}, {rating}/5: {_digest_feedback(feedback, self.digest_chars)}")
+
+    def reset_interviews(self):
+        """Forgets the interview ratings, topic ratings and feedback digest, keeping MCQ stats."""
+        self.ratings = {difficulty: {"count": 0, "total": 0, "min": None, "max": None} for difficulty in DIFFICULTIES}
+        self.recent_ratings.clear()
+        self.digest.clear()
+        for topic_stats in self.topics.values():
+            topic_stats["rating_total"] = 0
+            topic_stats["rating_count"] = 0
+
+    def add_mcq_score(self, score):
+        """Folds one graded MCQ attempt, as returned by score_mcqs, into the summary."""
+        self.mcq_attempts += 1
+        self.mcq_correct += score["score"]
+        self.mcq_total += score["total"]
+        for topic, breakdown in score["topics"].items():
+            topic_stats = self._topic(topic)
+            topic_stats["mcq_correct"] += breakdown["correct"]
+            topic_stats["mcq_total"] += breakdown["total"]
+
+    def weak_topics(self):
+        """Returns up to max_weak_topics (topic, proficiency) pairs below 70%, weakest first.
+
+        Proficiency blends MCQ accuracy with interview ratings scaled to 0-1.
+        """
+        scored = []
+        for topic, stats in self.topics.items():
+            parts = []
+            if stats["mcq_total"]:
+                parts.append(stats["mcq_correct"] / stats["mcq_total"])
+            if stats["rating_count"]:
+                parts.append((stats["rating_total"] / stats["rating_count"] - 1) / 4)
+            if parts:
+                scored.append((sum(parts) / len(parts), topic))
+        scored.sort()
+        return [(topic, proficiency) for proficiency, topic in scored[:self.max_weak_topics] if proficiency < 0.7]
+
+    def mcq_results(self):
+        """Renders the MCQ section of the report prompt."""
+        if not self.mcq_total:
+            return "No MCQ data available."
+        accuracy = 100 * self.mcq_correct / self.mcq_total
+        return f"{self.mcq_correct}/{self.mcq_total} correct ({accuracy:.0f}%) over {self.mcq_attempts} attempt(s)."
+
+    def interview_results(self):
+        """Renders the interview section of the report prompt, including the weakest topics."""
+        lines = []
+        if self.interview_count:
+            lines.append(f"{self.interview_count} questions answered.")
+            for difficulty, stats in self.ratings.items():
+                if stats["count"]:
+                    average = stats["total"] / stats["count"]
+                    lines.append(f"{difficulty}: {stats['count']} answered, average {average:.1f}/5, range {stats['min']}-{stats['max']}")
+            lines.append(f"Recent ratings: {', '.join(str(r) for r in self.recent_ratings)}")
+        else:
+            lines.append("No interview data available.")
+
+        weak = self.weak_topics()
+        if weak:
+            lines.append("Weakest topics: " + ", ".join(f"{topic} ({proficiency:.0%})" for topic, proficiency in weak))
+        if self.digest:
+            lines.append("Recent feedback:")
+            lines.extend(f"- {entry}" for entry in self.digest)
+        return "\n".join(lines)
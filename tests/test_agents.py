@@ -0,0 +1,26 @@
+import logging
+
+from coach.agents import TutorAgents
+from coach.backends import FakeBackend
+from coach.dedup import QuestionIndex
+
+ASKED = "How do hash maps handle collisions?"
+
+
+def test_duplicate_retries_name_the_rejected_candidate(caplog):
+    backend = FakeBackend(latency=0, tokens_per_second=0, outputs={"interview_agent": ASKED})
+    prompts = []
+    complete = backend.complete
+    backend.complete = lambda agent, content: prompts.append(content) or complete(agent, content)
+    index = QuestionIndex()
+    index.add(ASKED)
+
+    with caplog.at_level(logging.WARNING, logger="coach.agents"):
+        question = TutorAgents(backend=backend).generate_next_interview_question(
+            "Python", "Dicts", "Easy", question_index=index, max_attempts=3)
+
+    assert question == ASKED
+    assert len(prompts) == 3
+    assert ASKED not in prompts[0]
+    assert f"- {ASKED}" in prompts[1]
+    assert "near-duplicate" in caplog.text
@@ -0,0 +1,50 @@
+from coach.agents import TutorAgents
+from coach.backends import FakeBackend
+from coach.bank import QuestionBank, build_bank
+from coach.dedup import QuestionIndex
+
+MCQS = [{"text": f"Q{i}. Question {i}?", "options": ["A) yes", "B) no"], "correct": "A"} for i in range(1, 6)]
+
+
+def test_mcqs_are_served_only_when_enough_were_banked(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    bank.add_lesson("Python", "Decorators", "The lesson.", MCQS)
+
+    assert bank.get_mcqs("The lesson.", 3) == MCQS[:3]
+    assert bank.get_mcqs("  The lesson.\n", 5) == MCQS
+    assert bank.get_mcqs("The lesson.", 6) is None
+    assert bank.get_mcqs("Another lesson.", 1) is None
+
+
+def test_subjects_and_topics_are_normalized(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    bank.add_lesson("  Python ", "", "Whole subject.", MCQS)
+    bank.add_questions("Python", "Decorators", "Easy", ["What is a decorator?"])
+
+    assert bank.get_lesson("python", "PYTHON") == "Whole subject."
+    assert bank.draw_question("PYTHON", " decorators  ", "Easy") == "What is a decorator?"
+    assert bank.draw_question("Python", "Decorators", "Hard") is None
+
+
+def test_draw_question_skips_questions_already_asked(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    bank.add_questions("Python", "Dicts", "Easy", ["How do hash maps handle collisions?", "What is a Python generator?"])
+    asked = QuestionIndex()
+    asked.add("Explain how a hash map handles collisions.")
+
+    for _ in range(10):
+        assert bank.draw_question("Python", "Dicts", "Easy", asked) == "What is a Python generator?"
+    asked.add("What is a Python generator?")
+    assert bank.draw_question("Python", "Dicts", "Easy", asked) is None
+
+
+def test_build_bank_fills_questions_and_lessons(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    agents = TutorAgents(backend=FakeBackend(latency=0, tokens_per_second=0))
+
+    failures = build_bank(agents, bank, [("Python", "Decorators")], difficulties=["Easy"],
+                          questions_per_difficulty=3, num_mcqs=4, workers=2)
+
+    assert failures == 0
+    assert bank.stats() == {"questions": [("python", "decorators", "Easy", 3)], "lessons": 1}
+    assert len(bank.get_mcqs(bank.get_lesson("Python", "Decorators"), 4)) == 4
@@ -0,0 +1,54 @@
+from coach.agents import TutorAgents
+from coach.backends import FakeBackend
+from coach.cache import ContentCache
+
+
+def test_least_recently_used_entries_are_evicted_past_max_entries(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", "lesson_agent", "model", "first")
+    cache.put("b", "lesson_agent", "model", "second")
+    assert cache.get("a") == "first"
+
+    cache.put("c", "lesson_agent", "model", "third")
+
+    assert cache.get("a") == "first"
+    assert cache.get("b") is None
+    assert cache.get("c") == "third"
+
+
+def test_entries_are_evicted_past_max_bytes(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.put("a", "lesson_agent", "model", "123456")
+    cache.put("b", "lesson_agent", "model", "abcdef")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "abcdef"
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.put("a", "lesson_agent", "model", "stale")
+
+    assert cache.get("a") is None
+
+
+def test_keys_ignore_whitespace_and_case_but_not_agent_model_or_system_message():
+    key = ContentCache.make_key("lesson_agent", "Create a  lesson\non Python.", "model")
+
+    assert key == ContentCache.make_key("lesson_agent", "create a lesson on python.", "model")
+    assert key != ContentCache.make_key("mcq_agent", "Create a lesson on Python.", "model")
+    assert key != ContentCache.make_key("lesson_agent", "Create a lesson on Python.", "other-model")
+    assert key != ContentCache.make_key("lesson_agent", "Create a lesson on Python.", "model", "Be brief.")
+
+
+def test_editing_a_system_message_misses_the_cache(tmp_path):
+    agents = TutorAgents(cache=ContentCache(str(tmp_path / "cache.sqlite3")),
+                         backend=FakeBackend(latency=0, tokens_per_second=0))
+    agents.generate_lesson("Python", "Decorators")
+    agents.generate_lesson("Python", "Decorators")
+    agents.lesson_agent.system_message += " Keep it short."
+    agents.generate_lesson("Python", "Decorators")
+
+    lessons = next(row for row in agents.metrics.snapshot() if row["agent"] == "lesson_agent")
+    assert lessons["calls"] == 3
+    assert lessons["cache_hits"] == 1
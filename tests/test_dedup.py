@@ -0,0 +1,72 @@
+import pytest
+
+from coach.dedup import QuestionIndex, shingles
+
+# Rewordings of the same question, which the index must reject
+PARAPHRASES = [
+    ("What is the difference between a list and a tuple in Python?",
+     "Explain when lists and tuples should each be used in Python."),
+    ("How does Python's garbage collector handle reference cycles?",
+     "How are reference cycles handled by the Python garbage collector?"),
+    ("What is a decorator in Python and how would you write one?", "How do you write a decorator in Python?"),
+    ("Explain how a hash map handles collisions.", "How do hash maps handle collisions?"),
+    ("What is the difference between a process and a thread?", "Compare processes and threads."),
+    ("How would you design a rate limiter for an API?", "Design a rate limiter for an API."),
+    ("What are the benefits of database indexing?", "What benefits does indexing a database give?"),
+    ("Explain the CAP theorem.", "What does the CAP theorem state?"),
+    ("What is the difference between an abstract class and an interface in Java?",
+     "When should you use an interface instead of an abstract class in Java?"),
+]
+
+# Different questions, often asked through the same template, which must pass
+DISTINCT = [
+    ("What is the difference between a process and a thread, and when would you use each?",
+     "What is the difference between a list and a tuple, and when would you use each?"),
+    ("How does Python's GIL affect multithreaded programs?", "How do threads share memory in Python?"),
+    ("Explain how a hash map handles collisions.", "Explain how a hash map is resized."),
+    ("How would you design a rate limiter for an API?", "How would you design a URL shortener?"),
+    ("What is the difference between TCP and UDP?", "What is the difference between HTTP and HTTPS?"),
+    ("How do you reverse a linked list in place?", "How do you detect a cycle in a linked list?"),
+    ("What are the benefits of database indexing?", "What are the drawbacks of database normalization?"),
+    ("What is a Python generator and when would you use one?", "What is a Python decorator and when would you use one?"),
+]
+
+
+def test_shingles_fold_plurals_and_word_forms():
+    assert shingles("Lists and tuples") == shingles("a list and a tuple")
+    assert shingles("handled collisions") == shingles("handling a collision")
+    assert "class" in shingles("What is a class?")
+
+
+@pytest.mark.parametrize("asked, candidate", PARAPHRASES)
+def test_paraphrases_are_duplicates(asked, candidate):
+    index = QuestionIndex()
+    index.add(asked)
+
+    assert index.is_duplicate(candidate)
+
+
+@pytest.mark.parametrize("asked, candidate", DISTINCT)
+def test_distinct_questions_are_not_duplicates(asked, candidate):
+    index = QuestionIndex()
+    index.add(asked)
+
+    assert not index.is_duplicate(candidate)
+
+
+def test_parent_index_is_consulted_and_filled():
+    parent = QuestionIndex()
+    index = QuestionIndex(parent=parent)
+    index.add("How do hash maps handle collisions?")
+
+    assert parent.is_duplicate("Explain how a hash map handles collisions.")
+    assert QuestionIndex(parent=parent).is_duplicate("Explain how a hash map handles collisions.")
+
+
+def test_max_entries_evicts_the_oldest_question():
+    index = QuestionIndex(max_entries=2)
+    for question in ("Explain the CAP theorem.", "How do you reverse a linked list?", "What is a Python generator?"):
+        index.add(question)
+
+    assert index.questions == ["How do you reverse a linked list?", "What is a Python generator?"]
+    assert not index.is_duplicate("What does the CAP theorem state?")
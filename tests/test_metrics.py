@@ -0,0 +1,53 @@
+import json
+
+from coach.metrics import MetricsRecorder
+
+
+def test_hits_and_cancellations_stay_out_of_latency():
+    metrics = MetricsRecorder()
+    metrics.record("interview_agent", 2.0, ttft=0.5)
+    metrics.record("interview_agent", 0.0, cache_hit=True)
+    metrics.record("interview_agent", 0.01, ttft=0.01, cache_hit=True)
+    metrics.record("interview_agent", 0.3, cancelled=True)
+    metrics.record("interview_agent", 1.0, error="TimeoutError")
+
+    [row] = metrics.snapshot()
+
+    assert row["calls"] == 5
+    assert row["cache_hits"] == 2
+    assert row["cancelled"] == 1
+    assert row["errors"] == 1
+    assert row["avg_wall_time"] == 1.5
+    assert row["p50_wall_time"] == 2.0
+    assert row["avg_ttft"] == 0.5
+
+
+def test_prometheus_histogram_counts_llm_calls_only():
+    metrics = MetricsRecorder()
+    metrics.record("lesson_agent", 0.2)
+    metrics.record("lesson_agent", 0.0, cache_hit=True)
+    metrics.record("lesson_agent", 0.1, cancelled=True)
+
+    text = metrics.render_prometheus()
+
+    assert 'coach_agent_calls_total{agent="lesson_agent"} 3' in text
+    assert 'coach_agent_cancelled_total{agent="lesson_agent"} 1' in text
+    assert 'coach_agent_errors_total{agent="lesson_agent"} 0' in text
+    assert 'coach_agent_wall_time_seconds_bucket{agent="lesson_agent",le="0.1"} 0' in text
+    assert 'coach_agent_wall_time_seconds_count{agent="lesson_agent"} 1' in text
+
+
+def test_calls_are_logged_as_json_lines(tmp_path):
+    log_path = tmp_path / "metrics.jsonl"
+    metrics = MetricsRecorder(log_path=str(log_path))
+    metrics.record("lesson_agent", 0.2, prompt_tokens=10)
+    metrics.record("lesson_agent", 0.0, cache_hit=True)
+    metrics.close()
+    metrics.record("mcq_agent", 0.1, cancelled=True)
+    metrics.close()
+
+    entries = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+
+    assert [entry["agent"] for entry in entries] == ["lesson_agent", "lesson_agent", "mcq_agent"]
+    assert entries[0]["prompt_tokens"] == 10
+    assert entries[1]["cache_hit"] and entries[2]["cancelled"]
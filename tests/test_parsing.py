@@ -0,0 +1,136 @@
+from coach.parsing import MCQStreamParser, parse_batch_feedback, parse_mcqs, split_lesson_sections
+
+MCQ_TEXT = """Q1. What does a decorator return?
+A) A class
+B) A callable
+C) A module
+D) Nothing
+
+Correct Answer: B
+
+**Q2.** Which keyword defines a generator?
+- A) return
+- B) lambda
+- C) yield
+- D) pass
+**Correct Answer:** (C)
+
+Q3. A question the model never finished
+A) One
+B) Two
+
+Q4. No options at all
+
+Correct Answer: A
+"""
+
+
+def test_parse_mcqs_reads_options_answers_and_markdown():
+    questions = parse_mcqs(MCQ_TEXT)
+
+    assert [q["text"] for q in questions] == [
+        "Q1. What does a decorator return?", "Q2. Which keyword defines a generator?",
+        "Q3. A question the model never finished"]
+    assert [q["correct"] for q in questions] == ["B", "C", None]
+    assert questions[1]["options"] == ["A) return", "B) lambda", "C) yield", "D) pass"]
+
+
+def test_stream_parser_emits_each_question_once_complete():
+    parser = MCQStreamParser()
+    chunks = [MCQ_TEXT[i:i + 7] for i in range(0, len(MCQ_TEXT), 7)]
+    emitted = [len(parser.feed(chunk)) for chunk in chunks]
+
+    assert sum(emitted) + len(parser.close()) == 3
+    # Q1 is out as soon as its answer line ends, well before the text does
+    assert emitted.index(1) < len(chunks) // 3
+    assert parser.text == MCQ_TEXT
+
+
+BATCH_FEEDBACK = """Answer 1:
+Rating: 4/5
+Feedback: Clear and correct.
+
+**Answer 3:**
+Rating: 2/5
+Feedback: Missed the point.
+
+Answer 2:
+Feedback: No rating here.
+
+Answer 7:
+Rating: 5/5
+"""
+
+
+def test_parse_batch_feedback_maps_blocks_to_answers():
+    feedbacks = parse_batch_feedback(BATCH_FEEDBACK, 3)
+
+    assert feedbacks[0] == "Rating: 4/5\nFeedback: Clear and correct."
+    assert feedbacks[1] is None
+    assert feedbacks[2].startswith("Rating: 2/5")
+
+
+def test_parse_batch_feedback_without_headings_is_all_missing():
+    assert parse_batch_feedback("Rating: 4/5\nLooks fine.", 2) == [None, None]
+
+
+FILLER = "Decorators wrap a function to add behaviour without changing its body. " * 4
+
+CODE_LESSON = f"""# Decorators
+
+## Introduction
+{FILLER}
+
+## Examples
+{FILLER}
+```python
+# Define the decorator that wraps any function
+def timed(fn):
+    # Keep the wrapped function's name
+    return fn
+```
+
+## Summary
+{FILLER}
+"""
+
+
+def test_code_comments_are_not_headings():
+    sections = split_lesson_sections(CODE_LESSON)
+
+    assert [title for title, _ in sections] == ["Introduction", "Examples", "Summary"]
+    examples = dict(sections)["Examples"]
+    assert "```python\n# Define the decorator that wraps any function" in examples
+    assert examples.rstrip().endswith("```")
+
+
+def test_tilde_fences_and_longer_closing_fences():
+    lesson = f"## Intro\n{FILLER}\n~~~\n# not a heading\n~~~~\n## Outro\n{FILLER}"
+
+    assert [title for title, _ in split_lesson_sections(lesson)] == ["Intro", "Outro"]
+
+
+def test_merged_sections_keep_each_heading_once():
+    lesson = "## Introduction\nShort intro.\n\n## Key Concepts\nShort concepts.\n\n## Examples\nShort examples.\n"
+
+    [(title, text)] = split_lesson_sections(lesson, min_chars=200)
+
+    assert text.count("Introduction") == 1
+    assert text.count("Key Concepts") == 1
+    assert text.count("Examples") == 1
+    assert title == "Key Concepts"
+
+
+def test_max_sections_merges_without_repeating_titles():
+    lesson = "".join(f"## Part {i}\n{FILLER}\n" for i in range(8))
+
+    sections = split_lesson_sections(lesson, max_sections=3)
+
+    assert len(sections) == 3
+    text = "\n".join(text for _, text in sections)
+    for i in range(8):
+        assert text.count(f"Part {i}\n") <= 1
+
+
+def test_lesson_without_headings_is_one_section():
+    assert split_lesson_sections("Just some text.") == [("Lesson", "Just some text.")]
@@ -0,0 +1,242 @@
+import threading
+import time
+
+import pytest
+
+from coach import pipeline
+from coach.agents import TutorAgents
+from coach.backends import FakeBackend
+from coach.dedup import QuestionIndex
+from coach.pipeline import (QuestionPrefetcher, SectionedMCQGenerator, allocate_mcqs, evaluate_round, generate_round_questions, merge_section_mcqs,
+                            next_difficulty, round_difficulty)
+from coach.scheduler import INTERACTIVE, PREFETCH, Cancelled, RequestScheduler
+
+
+class ReservingScheduler(RequestScheduler):
+    """Records the tokens each admitted call reserves."""
+
+    def __init__(self):
+        super().__init__(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9)
+        self.reserved = []
+
+    def acquire(self, priority=0, tokens=0, cancel_event=None):
+        self.reserved.append(tokens)
+        super().acquire(priority, tokens, cancel_event)
+
+
+def make_agents(**backend_options):
+    return TutorAgents(backend=FakeBackend(latency=0, tokens_per_second=0, **backend_options))
+
+
+def mcq(text, *options):
+    return {"text": f"Q1. {text}", "options": list(options), "correct": "A"}
+
+
+def test_allocate_mcqs_is_proportional_with_one_each():
+    sections = [("Long", "x" * 600), ("Medium", "x" * 300), ("Short", "x" * 100)]
+
+    assert allocate_mcqs(sections, 10) == [5, 3, 2]
+    assert sum(allocate_mcqs(sections, 7)) == 7
+    assert allocate_mcqs(sections, 2) == [1, 1, 0]
+
+
+def test_merge_drops_cross_section_duplicates_and_fills_shortfalls():
+    results = [
+        ("Intro", [mcq("What is a decorator?", "A) A wrapper", "B) A loop"),
+                   mcq("Why would you write your own?", "A) Logging", "B) Speed")], 1),
+        ("Examples", [mcq("What is a decorator?", "A) A wrapper", "B) A loop"),
+                      mcq("How is functools.wraps used?", "A) On the inner function", "B) On the class")], 2),
+        ("Summary", [mcq("Name one built-in decorator.", "A) property", "B) print")], 1),
+    ]
+
+    questions = merge_section_mcqs(results, 4)
+
+    assert [q["text"] for q in questions] == [
+        "Q1. What is a decorator?", "Q2. Why would you write your own?", "Q3. How is functools.wraps used?",
+        "Q4. Name one built-in decorator."]
+    assert [q["topic"] for q in questions] == ["Intro", "Intro", "Examples", "Summary"]
+
+
+def test_merge_keeps_same_stem_with_different_options():
+    results = [("A", [mcq("Which is mutable?", "A) list", "B) tuple")], 1),
+               ("B", [mcq("Which is mutable?", "A) frozenset", "B) dict")], 1)]
+
+    assert len(merge_section_mcqs(results, 2)) == 2
+
+
+def test_difficulty_ladder():
+    assert next_difficulty("Medium", 5) == "Hard"
+    assert next_difficulty("Medium", 1) == "Easy"
+    assert next_difficulty("Hard", 5) == "Hard"
+    assert round_difficulty("Easy", [4, 5, 4]) == "Medium"
+    assert round_difficulty("Easy", []) == "Easy"
+
+
+def test_sectioned_generator_streams_questions_from_every_section():
+    agents = make_agents()
+    lesson = agents.generate_lesson("Python", "Decorators")
+
+    generator = SectionedMCQGenerator(agents, lesson, 6)
+    streamed = list(generator.iter_questions())
+    questions = generator.result()
+
+    assert len({title for title, _ in streamed}) > 1
+    assert all(question["options"] for _, question in streamed)
+    assert len(questions) == 6
+    assert [q["text"].split(".")[0] for q in questions] == [f"Q{i}" for i in range(1, 7)]
+
+
+def test_sectioned_generator_reserves_about_what_a_single_call_does():
+    agents = make_agents()
+    lesson = agents.generate_lesson("Python", "Decorators")
+
+    agents.scheduler = ReservingScheduler()
+    agents.generate_mcqs_from_lesson(lesson, 5, fresh=True)
+    single = sum(agents.scheduler.reserved)
+
+    agents.scheduler = ReservingScheduler()
+    SectionedMCQGenerator(agents, lesson, 5, fresh=True).result()
+    sectioned = agents.scheduler.reserved
+
+    assert len(sectioned) > 1
+    assert sum(sectioned) < 2 * single
+
+
+def test_sectioned_generator_cancel_stops_streaming_sections():
+    agents = make_agents()
+    lesson = agents.generate_lesson("Python", "Decorators")
+    agents.backend.tokens_per_second = 200
+
+    generator = SectionedMCQGenerator(agents, lesson, 6, fresh=True)
+    questions = generator.iter_questions()
+    next(questions)
+    start = time.perf_counter()
+    generator.cancel()
+    rest = list(questions)
+
+    assert time.perf_counter() - start < 0.5
+    assert len(rest) < 5
+    with pytest.raises(Cancelled):
+        generator.result()
+
+
+def test_sequential_generator_makes_one_call_at_a_time():
+    agents = make_agents()
+    lesson = agents.generate_lesson("Python", "Iterators")
+    active, peak = 0, 0
+    stream = agents.backend.stream
+
+    def counting_stream(agent, content, usage=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            yield from stream(agent, content, usage)
+        finally:
+            active -= 1
+
+    agents.backend.stream = counting_stream
+    questions = SectionedMCQGenerator(agents, lesson, 6, parallel=False).result()
+
+    assert len(questions) == 6
+    assert peak == 1
+
+
+def test_round_questions_do_not_wait_behind_prefetches():
+    agents = TutorAgents(backend=FakeBackend(latency=0.1, tokens_per_second=0))
+    release = threading.Event()
+    blockers = [pipeline._prefetch_executor.submit(release.wait) for _ in range(pipeline._prefetch_executor._max_workers)]
+    try:
+        start = time.perf_counter()
+        # Nothing counts as a duplicate, so no question is regenerated one by one
+        questions = generate_round_questions(agents, "Python", "Decorators", "Medium", 10, QuestionIndex(threshold=1.1))
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+        for blocker in blockers:
+            blocker.result()
+
+    assert len(questions) == 10
+    assert elapsed < 0.5
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def interview_calls(agents):
+    return next(row for row in agents.metrics.snapshot() if row["agent"] == "interview_agent")
+
+
+def test_prefetcher_runs_the_likely_candidate_interactively(monkeypatch):
+    agents = make_agents()
+    priorities = {}
+    generate = agents.generate_next_interview_question
+
+    def recording(subject, topic, difficulty, **kwargs):
+        priorities[difficulty] = kwargs["priority"]
+        return generate(subject, topic, difficulty, **kwargs)
+
+    monkeypatch.setattr(agents, "generate_next_interview_question", recording)
+    prefetcher = QuestionPrefetcher(agents, "Python", "Decorators", "Medium")
+    wait_until(lambda: len(priorities) == 3)
+    prefetcher.take("Medium")
+
+    assert priorities == {"Medium": INTERACTIVE, "Hard": PREFETCH, "Easy": PREFETCH}
+
+
+def test_prefetcher_take_cancels_the_other_candidates():
+    agents = make_agents()
+    agents.scheduler = RequestScheduler(max_concurrency=1)
+    # Holding the only slot keeps every candidate queued
+    agents.scheduler.acquire()
+    prefetcher = QuestionPrefetcher(agents, "Python", "Decorators", "Medium")
+    wait_until(lambda: agents.scheduler.queued == 3)
+
+    taken = pipeline._round_executor.submit(prefetcher.take, "Hard")
+    wait_until(lambda: agents.scheduler.queued == 1)
+    agents.scheduler.release()
+
+    assert taken.result(timeout=2)
+    assert interview_calls(agents)["cancelled"] == 2
+    assert interview_calls(agents)["calls"] == 3
+
+
+def test_prefetcher_cancel_drops_every_candidate():
+    agents = make_agents()
+    agents.scheduler = RequestScheduler(max_concurrency=1)
+    agents.scheduler.acquire()
+    prefetcher = QuestionPrefetcher(agents, "Python", "Decorators", "Medium")
+    wait_until(lambda: agents.scheduler.queued == 3)
+
+    prefetcher.cancel()
+    wait_until(lambda: agents.scheduler.queued == 0)
+    agents.scheduler.release()
+    prefetcher.cancel()
+
+    assert interview_calls(agents)["cancelled"] == 3
+
+
+def test_prefetchers_for_many_sessions_run_at_once():
+    agents = TutorAgents(backend=FakeBackend(latency=0.1, tokens_per_second=0))
+
+    start = time.perf_counter()
+    prefetchers = [QuestionPrefetcher(agents, "Python", "Decorators", "Medium") for _ in range(10)]
+    questions = [prefetcher.take("Medium") for prefetcher in prefetchers]
+    elapsed = time.perf_counter() - start
+
+    assert all(questions)
+    # Thirty candidates at once; an 8-thread pool would need four waves
+    assert elapsed < 0.3
+
+
+def test_evaluate_round_falls_back_for_answers_missing_from_a_batch():
+    agents = make_agents(outputs={"batch_feedback_agent": "Answer 1:\nRating: 5/5\nFeedback: Great.",
+                                  "feedback_agent": "Rating: 2/5\nFeedback: Single."})
+
+    results = evaluate_round(agents, ["Q1?", "Q2?", "Q3?"], ["a", "b", "c"], batch_size=2)
+
+    assert [result["rating"] for result in results] == [5, 2, 5]
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from coach.scheduler import BATCH, INTERACTIVE, PREFETCH, Cancelled, RequestScheduler
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def rate_limited():
+    raise RateLimited("429 Too Many Requests")
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_waiting_calls_are_admitted_by_priority_then_arrival():
+    scheduler = RequestScheduler(requests_per_minute=6000, tokens_per_minute=10**9, max_concurrency=1)
+    order = []
+    scheduler.acquire()
+
+    threads = []
+    for name, priority in [("batch", BATCH), ("prefetch-1", PREFETCH), ("interactive", INTERACTIVE), ("prefetch-2", PREFETCH)]:
+        thread = threading.Thread(target=scheduler.call, args=(lambda name=name: order.append(name), priority))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: scheduler.queued == len(threads))
+
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "prefetch-1", "prefetch-2", "batch"]
+
+
+def test_retryable_errors_are_retried_until_success():
+    scheduler = RequestScheduler(base_delay=0.001, max_delay=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            rate_limited()
+        return "ok"
+
+    assert scheduler.call(flaky) == "ok"
+    assert len(attempts) == 3
+
+
+def test_other_errors_and_exhausted_retries_propagate():
+    scheduler = RequestScheduler(max_retries=2, base_delay=0.001, max_delay=0.001)
+    attempts = []
+
+    def always_limited():
+        attempts.append(1)
+        rate_limited()
+
+    with pytest.raises(RateLimited):
+        scheduler.call(always_limited)
+    assert len(attempts) == 3
+
+    with pytest.raises(ValueError):
+        scheduler.call(lambda: int("not a number"))
+
+
+def test_streams_are_not_retried_after_output():
+    scheduler = RequestScheduler(base_delay=0.001, max_delay=0.001)
+
+    def broken_stream():
+        yield "partial"
+        rate_limited()
+
+    chunks = []
+    with pytest.raises(RateLimited):
+        for chunk in scheduler.stream(broken_stream):
+            chunks.append(chunk)
+    assert chunks == ["partial"]
+
+
+def test_cancel_event_aborts_a_queued_call():
+    scheduler = RequestScheduler(max_concurrency=1)
+    scheduler.acquire()
+    cancel_event = threading.Event()
+    outcome = []
+
+    def queued():
+        try:
+            scheduler.call(lambda: outcome.append("ran"), PREFETCH, cancel_event=cancel_event)
+        except Cancelled:
+            outcome.append("cancelled")
+
+    thread = threading.Thread(target=queued)
+    thread.start()
+    wait_until(lambda: scheduler.queued == 1)
+    cancel_event.set()
+    thread.join(2)
+    scheduler.release()
+
+    assert outcome == ["cancelled"]
+    assert scheduler.queued == 0
+
+
+def test_cancel_event_aborts_a_backoff():
+    scheduler = RequestScheduler(base_delay=30, max_delay=30)
+    cancel_event = threading.Event()
+    threading.Timer(0.05, cancel_event.set).start()
+
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        scheduler.call(rate_limited, cancel_event=cancel_event)
+    assert time.monotonic() - start < 5
@@ -0,0 +1,41 @@
+from coach.scoring import format_misses_for_review, format_score_report, missed_questions, score_mcqs
+
+QUESTIONS = [
+    {"text": "Q1. First?", "options": ["A) a", "B) b"], "correct": "A", "topic": "Basics"},
+    {"text": "Q2. Second?", "options": ["A) a", "B) b"], "correct": "B", "topic": "Basics"},
+    {"text": "Q3. Third?", "options": ["A) a", "B) b"], "correct": "A"},
+    {"text": "Q4. Unparsed?", "options": ["A) a", "B) b"], "correct": None},
+]
+
+
+def test_score_mcqs_grades_by_topic_and_skips_ungraded():
+    score = score_mcqs(QUESTIONS, {0: "A", 1: "A", 3: "B"}, default_topic="Lesson")
+
+    assert (score["score"], score["total"], score["ungraded"]) == (1, 3, 1)
+    assert score["percentage"] == 33.3
+    assert score["topics"] == {"Basics": {"correct": 1, "total": 2}, "Lesson": {"correct": 0, "total": 1}}
+    assert [r["is_correct"] for r in score["results"]] == [True, False, False, None]
+
+
+def test_misses_cover_wrong_and_blank_answers_only():
+    score = score_mcqs(QUESTIONS, {0: "A", 1: "A"})
+
+    misses = missed_questions(QUESTIONS, score)
+    review = format_misses_for_review(misses)
+
+    assert [question["text"] for question, _ in misses] == ["Q2. Second?", "Q3. Third?"]
+    assert "User's Answer: No answer" in review
+    assert "Q1. First?" not in review
+
+
+def test_score_report_lists_each_question():
+    report = format_score_report(score_mcqs(QUESTIONS, {0: "A"}))
+
+    assert report.startswith("**Score: 1/3 (33.3%)**")
+    assert "1 question(s) had no parsable correct answer" in report
+    assert "- Q2: ❌ your answer: none, correct: B" in report
+    assert "- Q4: not graded" in report
+
+
+def test_score_mcqs_with_no_questions():
+    assert score_mcqs([], {})["percentage"] == 0.0
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from coach.agents import TutorAgents
+from coach.backends import FakeBackend
+from coach.server import CoachAPI, HTTPError
+
+QUESTION = {"text": "Q1. What does yield make?", "options": ["A) A list", "B) A generator"], "correct": "B"}
+
+
+class Writer:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+@pytest.fixture
+def api():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield CoachAPI(TutorAgents(backend=FakeBackend(latency=0, tokens_per_second=0)), executor)
+
+
+def dispatch(api, path, payload):
+    writer = Writer()
+    asyncio.run(api._dispatch(writer, "POST", path, json.dumps(payload).encode("utf-8"), False))
+    head, _, body = writer.data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_grade_explains_misses(api):
+    status, score = dispatch(api, "/grade", {"questions": [QUESTION], "answers": ["A"], "explain": True})
+
+    assert status == 200
+    assert score["score"] == 0
+    assert score["explanation"]
+
+
+@pytest.mark.parametrize("question", [
+    {"options": ["A) x"], "correct": "A"},
+    {"text": "Q1. Missing options?", "correct": "A"},
+    {"text": "Q1. Bad options?", "options": "A) x", "correct": "A"},
+    {"text": "Q1. Bad answer key?", "options": ["A) x"], "correct": 1},
+    "Q1. Not an object",
+])
+def test_grade_rejects_malformed_questions_with_400(api, question):
+    status, body = dispatch(api, "/grade", {"questions": [question], "answers": ["B"], "explain": True})
+
+    assert status == 400
+    assert "questions must be objects" in body["error"]
+
+
+def test_unexpected_errors_do_not_leak_details(api, caplog):
+    async def broken(data):
+        raise RuntimeError("secret prompt text")
+
+    api.routes[("POST", "/grade")] = broken
+    with caplog.at_level(logging.ERROR, logger="coach.server"):
+        status, body = dispatch(api, "/grade", {})
+
+    assert status == 500
+    assert body == {"error": "internal server error"}
+    assert "secret prompt text" in caplog.text
+
+
+def test_handlers_raise_http_errors_for_missing_fields(api):
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(api.grade({"answers": []}))
+    assert error.value.status == 400
@@ -0,0 +1,41 @@
+import time
+
+from coach.store import INTERVIEW, MCQ, SessionStore, is_user_id, new_user_id
+
+
+def answer_event(question, rating):
+    return {"kind": INTERVIEW, "subject": "Python", "topic": "Dicts", "difficulty": "Easy", "rating": rating,
+            "payload": {"question": question, "answer": "An answer.", "feedback": "Good."}}
+
+
+def test_checkpoint_only_rewrites_the_given_values(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"))
+    store.checkpoint("s1", "u1", {"lesson_content": "Lesson", "current_difficulty": "Easy"})
+    store.checkpoint("s1", "u1", {"current_difficulty": "Hard"})
+
+    assert store.load("s1") == ("u1", {"lesson_content": "Lesson", "current_difficulty": "Hard"})
+    assert store.load("missing") is None
+
+
+def test_interview_history_is_read_back_from_events(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"))
+    store.checkpoint("s1", "u1", {}, [answer_event("Old question?", 2)])
+    started = time.time()
+    store.checkpoint("s1", "u1", {}, [answer_event("First?", 4), {"kind": MCQ, "correct": 3, "total": 5}])
+    store.checkpoint("s1", "u1", {}, [answer_event("Second?", 5)])
+
+    history = store.interview_history("s1", since=started)
+
+    assert [entry["question"] for entry in history] == ["First?", "Second?"]
+    assert history[0] == {"question": "First?", "answer": "An answer.", "feedback": "Good.", "rating": 4, "difficulty": "Easy"}
+    assert len(store.interview_history("s1")) == 3
+    assert store.progress("u1")["daily_mcqs"][0]["accuracy"] == 0.6
+
+
+def test_user_ids_are_random_keys_not_names():
+    user_id = new_user_id()
+
+    assert is_user_id(user_id)
+    assert user_id != new_user_id()
+    assert not is_user_id("alice")
+    assert not is_user_id(None)
@@ -0,0 +1,64 @@
+import json
+
+from coach.summary import PerformanceSummary
+
+FEEDBACK = "Rating: {rating}/5\nFeedback: " + "A long explanation of what the answer got right and wrong. " * 10
+
+
+def filled_summary(answers):
+    summary = PerformanceSummary()
+    for i in range(answers):
+        rating = i % 5 + 1
+        summary.add_interview(rating, ["Easy", "Medium", "Hard"][i % 3], FEEDBACK.format(rating=rating), f"Topic {i % 4}")
+    summary.add_mcq_score({"score": 3, "total": 5, "topics": {"Topic 0": {"correct": 1, "total": 3}}})
+    return summary
+
+
+def test_report_input_stays_bounded_however_many_answers():
+    short = filled_summary(3).interview_results()
+    long = filled_summary(300).interview_results()
+
+    assert len(long) < 2 * len(short)
+    assert "300 questions answered." in long
+    assert long.count("\n- ") == 6
+
+
+def test_state_round_trips_through_json():
+    summary = filled_summary(20)
+
+    restored = PerformanceSummary.from_state(json.loads(json.dumps(summary.state())))
+
+    assert restored.interview_results() == summary.interview_results()
+    assert restored.mcq_results() == summary.mcq_results()
+    assert restored.state() == summary.state()
+
+
+def test_weak_topics_blend_mcqs_and_ratings_weakest_first():
+    summary = PerformanceSummary(max_weak_topics=2)
+    summary.add_interview(1, "Easy", "Rating: 1/5", "Recursion")
+    summary.add_interview(2, "Easy", "Rating: 2/5", "Sorting")
+    summary.add_interview(5, "Easy", "Rating: 5/5", "Hashing")
+    summary.add_interview(4, "Easy", "Rating: 4/5", "Graphs")
+    summary.add_mcq_score({"score": 0, "total": 2, "topics": {"Graphs": {"correct": 0, "total": 2}}})
+
+    # Graphs blends 0% MCQ accuracy with a 75% rating
+    assert summary.weak_topics() == [("Recursion", 0.0), ("Sorting", 0.25)]
+    assert PerformanceSummary().weak_topics() == []
+
+
+def test_empty_summary_renders_placeholders():
+    summary = PerformanceSummary()
+
+    assert summary.mcq_results() == "No MCQ data available."
+    assert summary.interview_results() == "No interview data available."
+
+
+def test_reset_interviews_keeps_mcq_stats():
+    summary = filled_summary(20)
+
+    summary.reset_interviews()
+
+    assert summary.interview_results() == "No interview data available.\nWeakest topics: Topic 0 (33%)"
+    assert summary.mcq_results() == "3/5 correct (60%) over 1 attempt(s)."
+    summary.add_interview(5, "Hard", FEEDBACK.format(rating=5), "Topic 1")
+    assert "1 questions answered." in summary.interview_results()